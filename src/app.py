@@ -1,18 +1,24 @@
 import streamlit as st
 from repository import get_weather
-from views import main_dashboard, additional_dashboard, sidebar
+from views import (main_dashboard, additional_dashboard, comparison_dashboard, profile_dashboard,
+                   sidebar)
 from utils.constants import LIMIT_WEATHER_RECORDS
 from utils.logging_config import setup_logging
+from utils import tracing, telemetry
 
 
 def main():
     """Основная функция приложения."""
+    tracing.start_run()
     st.title("Погодный дашборд")
 
-    weather_df = get_weather(*sidebar.get_filters())
+    countries, cities, seasons, start_date, end_date = sidebar.get_filters()
+    weather_df = get_weather(countries, cities, seasons, start_date, end_date)
 
     if weather_df.empty:
         st.warning("Нет данных для выбранных фильтров.")
+        sidebar.display_trace_panel()
+        telemetry.dump_if_configured()
         return
 
     if len(weather_df) == LIMIT_WEATHER_RECORDS:
@@ -21,19 +27,30 @@ def main():
         st.warning("Пожалуйста выберите меньший временной диапазон "
                    "или территориальную область, чтобы получить результат целиком!")
 
-    tab1, tab2 = st.tabs(["Основной дашборд", "Дополнительные метрики"])
+    # Каждая секция дашбордов — фрагмент: изменение её виджетов перезапускает только её
+    tab1, tab2, tab3, tab4 = st.tabs(["Основной дашборд", "Дополнительные метрики", "Сравнение",
+                                      "Профиль данных"])
     with tab1:
         main_dashboard.display_metrics(weather_df)
         main_dashboard.display_charts_and_histograms(weather_df)
         main_dashboard.display_table(weather_df)
-        main_dashboard.display_download_button(weather_df)
     with tab2:
         additional_dashboard.display_additional_metrics(weather_df)
+        additional_dashboard.display_wind_rose(weather_df)
+        additional_dashboard.display_timeseries_analytics(countries, cities, start_date, end_date)
         additional_dashboard.display_seasonal_statistics(weather_df)
         additional_dashboard.display_download_button(weather_df)
         additional_dashboard.display_map(weather_df)
+    with tab3:
+        comparison_dashboard.display_comparison(countries, cities, seasons, start_date, end_date)
+    with tab4:
+        profile_dashboard.display_data_profile()
+
+    sidebar.display_trace_panel()
+    telemetry.dump_if_configured()
 
 
 if __name__ == "__main__":
     setup_logging()
+    telemetry.setup_telemetry()
     main()
@@ -0,0 +1,163 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+import streamlit.logger
+
+# Вне `streamlit run` каждый `@st.cache_data` при импорте предупреждает об отсутствии runtime.
+# Уровень задаётся до импорта модулей с кэшем; при spawn этот код выполняется и в процессах пула.
+streamlit.logger.set_log_level("error")
+
+from repository import dataframe_to_excel, query_weather  # noqa: E402
+from services import metrics_calculator as metrics  # noqa: E402
+from utils.column_names import COMPARISON_NAMES, MAIN_METRICS  # noqa: E402
+from utils.logging_config import setup_logging  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+FILTER_FIELDS = ("countries", "cities", "seasons", "start_date", "end_date")
+DATA_FORMATS = ("csv", "xlsx", "none")
+EXCEL_MAX_ROWS = 1_048_575  # Без строки заголовка
+
+
+def load_specs(path: str) -> list[tuple[str, tuple]]:
+    """Читает JSON-список наборов фильтров.
+
+    Каждый набор — либо список в порядке `sidebar.get_filters`
+    (countries, cities, seasons, start_date, end_date), либо объект с этими ключами
+    и необязательным именем `name`, которое задаёт каталог отчёта.
+    """
+    with open(path, encoding="utf-8") as file:
+        raw_specs = json.load(file)
+    if not isinstance(raw_specs, list) or not raw_specs:
+        raise ValueError("Файл с фильтрами должен содержать непустой JSON-список")
+
+    specs = []
+    for index, raw in enumerate(raw_specs, start=1):
+        if isinstance(raw, dict):
+            name = raw.get("name") or f"report_{index:03d}"
+            spec = tuple(raw.get(field) for field in FILTER_FIELDS)
+        elif isinstance(raw, list) and len(raw) == len(FILTER_FIELDS):
+            name = f"report_{index:03d}"
+            spec = tuple(raw)
+        else:
+            raise ValueError(f"Набор фильтров №{index} должен быть объектом "
+                             f"или списком из {len(FILTER_FIELDS)} элементов")
+        # Списки — как в виджетах боковой панели, пустой список означает «без фильтра»
+        countries, cities, seasons, start_date, end_date = spec
+        spec = (list(countries or []), list(cities or []), list(seasons or []),
+                start_date, end_date)
+        specs.append((re.sub(r"[^\w.-]+", "_", str(name)), spec))
+
+    names = [name for name, _ in specs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Имена отчётов повторяются: {', '.join(duplicates)}")
+    return specs
+
+
+def init_worker() -> None:
+    """Настраивает логирование в процессе (основном и в каждом процессе пула)."""
+    setup_logging()
+
+
+def write_data(df: pd.DataFrame, report_dir: Path, data_format: str) -> Path | None:
+    """Сохраняет выгрузку данных отчёта так же, как кнопка скачивания в дашборде."""
+    if data_format == "none":
+        return None
+    if data_format == "xlsx" and len(df) > EXCEL_MAX_ROWS:
+        logger.warning(f"{len(df)} строк не помещаются на лист Excel, выгрузка сохранена в CSV")
+        data_format = "csv"
+    path = report_dir / f"weather_data.{data_format}"
+    if data_format == "xlsx":
+        path.write_bytes(dataframe_to_excel(df))
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+def run_spec(name: str, spec: tuple, output_dir: str, data_format: str) -> dict:
+    """Строит отчёт по одному набору фильтров и возвращает строку сводки KPI."""
+    start = time.perf_counter()
+    countries, cities, seasons, start_date, end_date = spec
+    logger.info(f"Отчёт {name}: запуск в процессе {os.getpid()}")
+
+    # Некэшируемые функции: в кэше процесса отчёта копии больших кадров не нужны
+    df = query_weather(countries, cities, seasons, start_date, end_date, limit=None)
+    summary = {"name": name, "rows": len(df)}
+    if df.empty:
+        logger.warning(f"Отчёт {name}: нет данных для выбранных фильтров")
+        return {**summary, "status": "empty", "duration_s": time.perf_counter() - start}
+
+    kpis = {**metrics.calculate_main_metrics(df), **metrics.calculate_additional_metrics(df)}
+    kpis["min_temp"], kpis["max_temp"] = kpis.pop("range_temp")
+    seasonal_stat = metrics.compute_seasonal_statistics(df, metrics=MAIN_METRICS)
+
+    report_dir = Path(output_dir) / name
+    report_dir.mkdir(parents=True, exist_ok=True)
+    (report_dir / "seasonal_statistics.xlsx").write_bytes(
+        dataframe_to_excel(seasonal_stat, index=True, sheet_name="Seasonal Statistics")
+    )
+    write_data(df, report_dir, data_format)
+
+    duration = time.perf_counter() - start
+    logger.info(f"Отчёт {name}: {len(df)} строк, {duration:.1f} с")
+    return {**summary, "status": "ok", "duration_s": duration, **kpis}
+
+
+def run_batch(
+    specs: list[tuple[str, tuple]],
+    output_dir: str,
+    workers: int | None = None,
+    data_format: str = "csv",
+) -> pd.DataFrame:
+    """Выполняет отчёты параллельно в пуле процессов и сохраняет общую сводку KPI."""
+    workers = min(workers or os.cpu_count() or 1, len(specs)) or 1
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    logger.info(f"Пакетный запуск: {len(specs)} отчётов, {workers} процессов")
+
+    start = time.perf_counter()
+    results = {}
+    # spawn: каждый процесс создаёт собственное подключение к базе при импорте repository
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=init_worker) as executor:
+        futures = {executor.submit(run_spec, name, spec, output_dir, data_format): name
+                   for name, spec in specs}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logger.error(f"Отчёт {name}: ошибка: {e}")
+                results[name] = {"name": name, "status": "error", "error": str(e)}
+            logger.info(f"Готово отчётов: {len(results)} из {len(specs)}")
+
+    summary = pd.DataFrame([results[name] for name, _ in specs])
+    summary.to_csv(Path(output_dir) / "kpis.csv", index=False)
+    summary.rename(columns=COMPARISON_NAMES).to_excel(Path(output_dir) / "kpis.xlsx",
+                                                      index=False, sheet_name="KPI")
+    logger.info(f"Пакетный запуск завершён за {time.perf_counter() - start:.1f} с, "
+                f"сводка в {Path(output_dir) / 'kpis.csv'}")
+    return summary
+
+
+if __name__ == "__main__":
+    init_worker()
+    parser = argparse.ArgumentParser(description="Пакетное построение отчётов без интерфейса")
+    parser.add_argument("specs", help="JSON-файл со списком наборов фильтров")
+    parser.add_argument("--output-dir", default="reports", help="каталог для отчётов")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="количество процессов (по умолчанию — число ядер)")
+    parser.add_argument("--data-format", choices=DATA_FORMATS, default="csv",
+                        help="формат выгрузки данных каждого отчёта")
+    args = parser.parse_args()
+    summary = run_batch(load_specs(args.specs), args.output_dir, args.workers, args.data_format)
+    sys.exit(1 if (summary["status"] == "error").any() else 0)
@@ -0,0 +1,184 @@
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+from repository import engine
+from services import metrics_calculator
+from services.comparison import query_comparison_metrics
+from services.timeseries_analytics import query_timeseries_analytics
+from services.wind_statistics import calculate_wind_rose
+from utils.logging_config import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+def measure(func, *args, repeat: int = 3, **kwargs) -> tuple[float, object]:
+    """Возвращает лучшее время выполнения (мс) из `repeat` запусков и результат."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best, result
+
+
+def pick_cities(count: int) -> list[str]:
+    """Выбирает города с наибольшим числом наблюдений."""
+    with engine.connect() as conn:
+        df = pd.read_sql(text(
+            "SELECT city_name FROM weather GROUP BY city_name ORDER BY COUNT(*) DESC LIMIT :n"
+        ), conn, params={"n": count})
+    return df["city_name"].tolist()
+
+
+def pandas_timeseries(metric: str, cities: list[str], start_date, end_date) -> pd.DataFrame:
+    """Эталонный расчёт в pandas: вся история городов загружается в память."""
+    stmt = text(f"SELECT city_name, date, {metric} AS value FROM weather "
+                f"WHERE city_name IN :cities").bindparams(bindparam("cities", expanding=True))
+    with engine.connect() as conn:
+        df = pd.read_sql(stmt, conn, params={"cities": cities})
+    df["date"] = pd.to_datetime(df["date"])
+    df = df.sort_values(["city_name", "date"])
+
+    normals = df.groupby(["city_name", df["date"].dt.strftime("%m-%d")])["value"].mean()
+    normals.index.names = ["city_name", "month_day"]
+    rolling = df.set_index("date").groupby("city_name")["value"]
+    df["rolling_7"] = rolling.rolling("7D").mean().to_numpy()
+    df["rolling_30"] = rolling.rolling("30D").mean().to_numpy()
+    df["normal"] = normals.reindex(
+        pd.MultiIndex.from_arrays([df["city_name"], df["date"].dt.strftime("%m-%d")])
+    ).to_numpy()
+    df["anomaly"] = df["value"] - df["normal"]
+    previous = df[["city_name", "date", "value"]].drop_duplicates(["city_name", "date"])
+    previous = previous[previous["date"].dt.strftime("%m-%d") != "02-29"]
+    previous = previous.assign(date=previous["date"] + pd.DateOffset(years=1))
+    df = df.merge(previous, on=["city_name", "date"], how="left", suffixes=("", "_prev"))
+    df["yoy_delta"] = df["value"] - df["value_prev"]
+    mask = (df["date"] >= pd.to_datetime(start_date)) & (df["date"] <= pd.to_datetime(end_date))
+    return df[mask].drop(columns="value_prev").reset_index(drop=True)
+
+
+def benchmark_timeseries(cities_count: int, start_date: str, end_date: str, repeat: int):
+    """Сравнивает расчёт временных рядов в SQL и в pandas."""
+    cities = pick_cities(cities_count)
+    sql_ms, sql_df = measure(query_timeseries_analytics, "avg_temp_c", cities,
+                             start_date, end_date, repeat=repeat)
+    month_ms, month_df = measure(query_timeseries_analytics, "avg_temp_c", cities,
+                                 start_date, end_date, "month", repeat=repeat)
+    pandas_ms, pandas_df = measure(pandas_timeseries, "avg_temp_c", cities,
+                                   start_date, end_date, repeat=repeat)
+
+    merged = sql_df.merge(pandas_df, left_on=["city_name", "period"],
+                          right_on=["city_name", "date"], suffixes=("_sql", "_pd"))
+    max_diff = max(
+        np.nanmax(np.abs(merged[f"{col}_sql"] - merged[f"{col}_pd"]).to_numpy(), initial=0.0)
+        for col in ["rolling_7", "rolling_30", "anomaly", "yoy_delta"]
+    )
+    logger.info(f"Временные ряды, {len(cities)} городов, {start_date}..{end_date}")
+    logger.info(f"  SQL (дни):    {sql_ms:8.1f} мс, {len(sql_df)} строк")
+    logger.info(f"  SQL (месяцы): {month_ms:8.1f} мс, {len(month_df)} строк")
+    logger.info(f"  pandas:       {pandas_ms:8.1f} мс, {len(pandas_df)} строк")
+    logger.info(f"  Максимальное расхождение SQL и pandas: {max_diff:.2e}")
+
+
+def legacy_wind_direction_mode(df: pd.DataFrame) -> str:
+    """Прежняя реализация через pd.cut и mode (для сравнения)."""
+    if df["avg_wind_dir_deg"].dropna().empty:
+        return "Нет данных"
+    bins = [0, 45, 90, 135, 180, 225, 270, 315, 360]
+    labels = ["Север", "Сев.-Вост.", "Восток", "Юг.-Вост.", "Юг", "Юг.-Зап.", "Запад", "Сев.-Зап."]
+    wind_dir = pd.cut(df["avg_wind_dir_deg"], bins=bins, labels=labels, include_lowest=True)
+    return wind_dir.mode()[0] if not wind_dir.mode().empty else "Нет данных"
+
+
+def benchmark_wind_direction(rows: int, repeat: int):
+    """Сравнивает векторизованную розу ветров с прежним расчётом направления."""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "avg_wind_dir_deg": rng.uniform(0, 360, rows),
+        "avg_wind_speed_kmh": rng.gamma(2, 5, rows),
+    })
+    df.loc[df.sample(frac=0.1, random_state=0).index, "avg_wind_dir_deg"] = np.nan
+    legacy_ms, _ = measure(legacy_wind_direction_mode, df, repeat=repeat)
+    mode_ms, _ = measure(metrics_calculator.calculate_wind_direction_mode, df, repeat=repeat)
+    rose_ms, _ = measure(calculate_wind_rose, df, repeat=repeat)
+    logger.info(f"Направление ветра, {rows} строк")
+    logger.info(f"  pd.cut + mode:             {legacy_ms:8.1f} мс")
+    logger.info(f"  bincount (мода):           {mode_ms:8.1f} мс")
+    logger.info(f"  bincount (роза, 16 x 5):   {rose_ms:8.1f} мс")
+
+
+def pandas_comparison(cities: list[str], start_date, end_date) -> pd.DataFrame:
+    """Эталонное сравнение: метрики `metrics_calculator` отдельно по каждому городу."""
+    stmt = text("SELECT * FROM weather WHERE city_name IN :cities "
+                "AND date BETWEEN :start_date AND :end_date"
+                ).bindparams(bindparam("cities", expanding=True))
+    with engine.connect() as conn:
+        df = pd.read_sql(stmt, conn, params={"cities": cities, "start_date": start_date,
+                                             "end_date": end_date})
+    rows = []
+    for city, city_df in df.groupby("city_name"):
+        min_temp, max_temp = metrics_calculator.calculate_range_temp(city_df)
+        rows.append({
+            "city_name": city,
+            "avg_temp": metrics_calculator.calculate_avg_temp(city_df),
+            "median_temp": metrics_calculator.calculate_median_temp(city_df),
+            "precip_days": metrics_calculator.calculate_precip_days(city_df),
+            "min_temp": min_temp,
+            "max_temp": max_temp,
+            "extreme_temp_diff": metrics_calculator.calculate_extreme_temp_diff(city_df),
+            "wind_direction_mode": metrics_calculator.calculate_wind_direction_mode(city_df),
+            "rain_days": metrics_calculator.calculate_rain_days(city_df),
+            "snow_days": metrics_calculator.calculate_snow_days(city_df),
+            "temp_precip_corr": metrics_calculator.calculate_temp_precip_corr(city_df),
+        })
+    return pd.DataFrame(rows)
+
+
+def benchmark_comparison(cities_count: int, start_date: str, end_date: str, repeat: int):
+    """Сравнивает сгруппированный SQL-расчёт метрик с расчётом по каждому городу в pandas."""
+    cities = pick_cities(cities_count)
+    sql_ms, sql_df = measure(query_comparison_metrics, "city_name", cities,
+                             None, start_date, end_date, repeat=repeat)
+    country_ms, country_df = measure(query_comparison_metrics, "country", cities,
+                                     None, start_date, end_date, repeat=repeat)
+    all_ms, all_df = measure(query_comparison_metrics, "city_name", None,
+                             None, start_date, end_date, repeat=repeat)
+    pandas_ms, pandas_df = measure(pandas_comparison, cities, start_date, end_date,
+                                   repeat=repeat)
+
+    merged = sql_df.merge(pandas_df, on="city_name", suffixes=("_sql", "_pd"))
+    max_diff = max(
+        np.nanmax(np.abs(merged[f"{col}_sql"] - merged[f"{col}_pd"]).to_numpy(), initial=0.0)
+        for col in ["avg_temp", "median_temp", "precip_days", "min_temp", "max_temp",
+                    "extreme_temp_diff", "rain_days", "snow_days", "temp_precip_corr"]
+    )
+    wind_mismatches = (merged["wind_direction_mode_sql"] != merged["wind_direction_mode_pd"]).sum()
+    logger.info(f"Сравнение, {len(cities)} городов, {start_date}..{end_date}")
+    logger.info(f"  SQL (города): {sql_ms:8.1f} мс, {len(sql_df)} строк")
+    logger.info(f"  SQL (страны): {country_ms:8.1f} мс, {len(country_df)} строк")
+    logger.info(f"  SQL (все города): {all_ms:8.1f} мс, {len(all_df)} строк")
+    logger.info(f"  pandas:       {pandas_ms:8.1f} мс, {len(pandas_df)} строк")
+    logger.info(f"  Максимальное расхождение SQL и pandas: {max_diff:.2e} "
+                f"(медиана — с точностью до 0.1 °C), "
+                f"расхождений направления ветра: {wind_mismatches}")
+
+
+if __name__ == "__main__":
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Замеры производительности аналитики")
+    parser.add_argument("--cities", type=int, default=10, help="количество городов")
+    parser.add_argument("--start-date", default="2010-01-01")
+    parser.add_argument("--end-date", default="2020-12-31")
+    parser.add_argument("--wind-rows", type=int, default=5_000_000,
+                        help="размер синтетической выборки для направления ветра")
+    parser.add_argument("--repeat", type=int, default=3, help="количество повторов замера")
+    args = parser.parse_args()
+    benchmark_timeseries(args.cities, args.start_date, args.end_date, args.repeat)
+    benchmark_wind_direction(args.wind_rows, args.repeat)
+    benchmark_comparison(args.cities, args.start_date, args.end_date, args.repeat)
@@ -0,0 +1,178 @@
+import logging
+import re
+import sys
+import urllib.error
+import urllib.request
+
+import pandas as pd
+import streamlit as st
+import streamlit.logger
+
+# Вне `streamlit run` `@st.cache_data` предупреждает об отсутствии runtime
+streamlit.logger.set_log_level("error")
+
+from utils import telemetry, tracing  # noqa: E402
+from utils.logging_config import setup_logging  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+_NAME = r"[a-zA-Z_:][a-zA-Z0-9_:]*"
+_SAMPLE = re.compile(rf"^({_NAME})(?:\{{(.*)\}})? (\S+)$")
+_LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"(?:,|$)')
+_HISTOGRAM_SUFFIXES = ("_bucket", "_sum", "_count")
+
+
+def _parse_labels(text: str) -> dict[str, str]:
+    labels = {}
+    position = 0
+    while position < len(text):
+        match = _LABEL.match(text, position)
+        if match is None:
+            raise ValueError(f"некорректные метки: {{{text}}}")
+        labels[match.group(1)] = match.group(2)
+        position = match.end()
+    return labels
+
+
+def _family(name: str, types: dict[str, str]) -> str | None:
+    if name in types:
+        return name
+    for suffix in _HISTOGRAM_SUFFIXES:
+        base = name.removesuffix(suffix)
+        if base != name and types.get(base) == "histogram":
+            return base
+    return None
+
+
+def validate_exposition(text: str) -> dict[str, list[tuple[str, dict, float]]]:
+    """Проверяет текстовый формат Prometheus 0.0.4 и возвращает образцы по семействам.
+
+    Проверяются строки HELP и TYPE (по одной на семейство, до образцов), синтаксис образцов
+    и меток, а у гистограмм — возрастающие границы, накопительные корзины и равенство
+    корзины +Inf и _count. При нарушении выбрасывается ValueError с номером строки.
+    """
+    if not text.endswith("\n"):
+        raise ValueError("вывод должен заканчиваться переводом строки")
+    helps, types = set(), {}
+    samples: dict[str, list[tuple[str, dict, float]]] = {}
+    for number, line in enumerate(text.splitlines(), 1):
+        try:
+            if line.startswith("# HELP "):
+                name = line.split(" ", 3)[2]
+                if name in helps:
+                    raise ValueError(f"повторный HELP для {name}")
+                helps.add(name)
+            elif line.startswith("# TYPE "):
+                _, _, name, metric_type = line.split(" ")
+                if name in types or name in samples:
+                    raise ValueError(f"TYPE для {name} повторён или идёт после образцов")
+                if metric_type not in ("counter", "gauge", "histogram", "summary", "untyped"):
+                    raise ValueError(f"неизвестный тип {metric_type}")
+                types[name] = metric_type
+            elif line.startswith("#") or not line:
+                continue
+            else:
+                match = _SAMPLE.match(line)
+                if match is None:
+                    raise ValueError("некорректный образец")
+                name, labels, value = match.groups()
+                family = _family(name, types)
+                if family is None:
+                    raise ValueError(f"образец {name} без TYPE")
+                samples.setdefault(family, []).append(
+                    (name, _parse_labels(labels or ""), float(value))
+                )
+        except ValueError as e:
+            raise ValueError(f"строка {number}: {e}: {line}") from e
+
+    for family, family_samples in samples.items():
+        if types[family] == "histogram":
+            _validate_histogram(family, family_samples)
+    return samples
+
+
+def _validate_histogram(family: str, samples: list[tuple[str, dict, float]]) -> None:
+    series: dict[tuple, dict] = {}
+    for name, labels, value in samples:
+        key = tuple(sorted((k, v) for k, v in labels.items() if k != "le"))
+        entry = series.setdefault(key, {"buckets": [], "count": None, "sum": None})
+        if name.endswith("_bucket"):
+            entry["buckets"].append((float(labels["le"]), value))
+        else:
+            entry[name.removeprefix(f"{family}_")] = value
+    for key, entry in series.items():
+        bounds = [bound for bound, _ in entry["buckets"]]
+        counts = [count for _, count in entry["buckets"]]
+        if not bounds or bounds[-1] != float("inf") or bounds != sorted(set(bounds)):
+            raise ValueError(f"{family}{dict(key)}: границы корзин не возрастают до +Inf")
+        if counts != sorted(counts):
+            raise ValueError(f"{family}{dict(key)}: корзины не накопительные")
+        if entry["count"] != counts[-1] or entry["sum"] is None:
+            raise ValueError(f"{family}{dict(key)}: _count не равен корзине +Inf или нет _sum")
+
+
+@tracing.traced("check_metrics.cached_frame", cached=True)
+@st.cache_data(show_spinner=False)
+def cached_frame(rows: int) -> pd.DataFrame:
+    """Кэшируемый результат, чтобы в метриках появились промах, попадание и объём кэша."""
+    tracing.mark_cache_miss()
+    return pd.DataFrame({"value": range(rows)})
+
+
+def _fetch(url: str) -> tuple[int, str, str]:
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return (response.status, response.headers["Content-Type"],
+                    response.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers["Content-Type"], ""
+
+
+def check_metrics() -> list[str]:
+    """Проверяет `render_prometheus` и HTTP-эндпоинт; возвращает список ошибок."""
+    errors = []
+    tracing.add_sink(telemetry.observe_trace)
+    tracing.start_run()
+    cached_frame(1_000)
+    cached_frame(1_000)
+
+    try:
+        samples = validate_exposition(telemetry.render_prometheus())
+        durations = samples.get("weather_app_operation_duration_seconds", [])
+        caches = {labels.get("cache") for name, labels, _ in durations
+                  if labels.get("operation") == "check_metrics.cached_frame"}
+        if caches != {"hit", "miss"}:
+            errors.append(f"длительности не разделены по cache=hit|miss: {caches}")
+        memory = [value for _, labels, value in samples.get("weather_app_cache_memory_bytes", [])
+                  if labels.get("function", "").endswith("cached_frame")]
+        if not memory or memory[0] <= 0:
+            errors.append("нет объёма кэша cached_frame в weather_app_cache_memory_bytes")
+    except ValueError as e:
+        errors.append(f"render_prometheus: {e}")
+
+    server = telemetry.start_http_server(0, host="127.0.0.1")
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        status, content_type, body = _fetch(f"{base_url}/metrics")
+        if status != 200 or content_type != telemetry.PROMETHEUS_CONTENT_TYPE:
+            errors.append(f"/metrics: статус {status}, Content-Type {content_type}")
+        try:
+            validate_exposition(body)
+        except ValueError as e:
+            errors.append(f"/metrics: {e}")
+        status, _, _ = _fetch(f"{base_url}/other")
+        if status != 404:
+            errors.append(f"/other: ожидался статус 404, получен {status}")
+    finally:
+        server.shutdown()
+    return errors
+
+
+if __name__ == "__main__":
+    setup_logging()
+    errors = check_metrics()
+    for error in errors:
+        logger.error(error)
+    if not errors:
+        logger.info("Формат метрик и эндпоинт /metrics в порядке")
+    sys.exit(1 if errors else 0)
@@ -1,8 +1,12 @@
+import argparse
 import pandas as pd
 import logging
 from sqlalchemy import create_engine, text
 from sqlalchemy.engine import Engine
 from pathlib import Path
+from services.comparison_aggregates import (MONTHLY_AGGREGATES, MONTHLY_TABLE, TEMPERATURE_TABLE,
+                                            monthly_sql, temperature_sql)
+from utils.column_names import NORMALS_METRICS
 from utils.constants import CHUNK_SIZE
 from utils.logging_config import setup_logging
 
@@ -64,6 +68,61 @@ def load_weather(engine: Engine) -> None:
         conn.commit()
 
 
+def load_climate_normals(engine: Engine) -> None:
+    """Рассчитывает климатические нормы городов по дню года (ММ-ДД) за всю историю."""
+    logger.info("Расчёт климатических норм")
+    averages = ",\n".join(f"AVG({metric}) AS {metric}" for metric in NORMALS_METRICS)
+    with engine.connect() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS climate_normals"))
+        conn.execute(text(f"""
+            CREATE TABLE climate_normals AS
+            SELECT city_name,
+                   strftime('%m-%d', date) AS month_day,
+                   {averages},
+                   COUNT(*) AS observations
+            FROM weather
+            GROUP BY city_name, month_day
+        """))
+        conn.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_climate_normals "
+            "ON climate_normals (city_name, month_day)"
+        ))
+        conn.commit()
+
+
+def load_comparison_aggregates(engine: Engine) -> None:
+    """Рассчитывает помесячные агрегаты и гистограммы температуры для сравнения."""
+    logger.info("Расчёт агрегатов для сравнения")
+    columns = ",\n".join(MONTHLY_AGGREGATES)
+    with engine.connect() as conn:
+        # Таблицы без rowid хранятся в порядке ключа: агрегаты читаются подряд по диапазону
+        # месяцев, а гистограмма группируется по городу и корзине без сортировки
+        conn.execute(text(f"DROP TABLE IF EXISTS {MONTHLY_TABLE}"))
+        conn.execute(text(f"""
+            CREATE TABLE {MONTHLY_TABLE} (
+                city_name TEXT NOT NULL,
+                month TEXT NOT NULL,
+                season TEXT NOT NULL,
+                {columns},
+                PRIMARY KEY (month, city_name, season)
+            ) WITHOUT ROWID
+        """))
+        conn.execute(text(f"INSERT INTO {MONTHLY_TABLE} {monthly_sql()}"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {TEMPERATURE_TABLE}"))
+        conn.execute(text(f"""
+            CREATE TABLE {TEMPERATURE_TABLE} (
+                city_name TEXT NOT NULL,
+                month TEXT NOT NULL,
+                season TEXT NOT NULL,
+                temp_bin INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (city_name, temp_bin, month, season)
+            ) WITHOUT ROWID
+        """))
+        conn.execute(text(f"INSERT INTO {TEMPERATURE_TABLE} {temperature_sql()}"))
+        conn.commit()
+
+
 def prepare_data() -> None:
     """Подготавливает данные, загружая страны, города и погоду в базу данных."""
     logger.info("Начало подготовки данных")
@@ -75,10 +134,23 @@ def prepare_data() -> None:
     load_countries(engine)
     load_cities(engine)
     load_weather(engine)
+    load_climate_normals(engine)
+    load_comparison_aggregates(engine)
 
     logger.info("Подготовка данных завершена")
 
 
 if __name__ == "__main__":
     setup_logging()
-    prepare_data()
+    parser = argparse.ArgumentParser(description="Подготовка базы данных")
+    parser.add_argument("--normals-only", action="store_true",
+                        help="только пересчитать климатические нормы в существующей базе")
+    parser.add_argument("--aggregates-only", action="store_true",
+                        help="только пересчитать агрегаты для сравнения в существующей базе")
+    args = parser.parse_args()
+    if args.normals_only:
+        load_climate_normals(create_engine(f'sqlite:///{DB_PATH}'))
+    elif args.aggregates_only:
+        load_comparison_aggregates(create_engine(f'sqlite:///{DB_PATH}'))
+    else:
+        prepare_data()
@@ -0,0 +1,423 @@
+import argparse
+import json
+import logging
+import math
+import os
+import tempfile
+import time
+from collections import Counter
+from contextlib import ExitStack
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from utils.constants import CHUNK_SIZE, PARQUET_PATH, PROFILE_PATH
+from utils.logging_config import setup_logging
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = (0.01, 0.25, 0.5, 0.75, 0.99)
+HISTOGRAM_BINS = 4096  # Погрешность квантилей — не больше (max - min) / HISTOGRAM_BINS
+DUPLICATE_KEYS = ("city_name", "date")
+DUPLICATE_PARTITIONS = 64
+MAX_TRACKED_VALUES = 100_000  # Больше различных значений — не считаем частоты столбца
+TOP_VALUES = 10
+
+
+class Moments:
+    """Объединяемые моменты до четвёртого порядка по нескольким столбцам сразу.
+
+    Партии объединяются по формулам Пебая, поэтому результат совпадает с расчётом по
+    всем данным сразу, а в памяти хранится только несколько чисел на столбец.
+    """
+
+    def __init__(self, columns: int):
+        self.n = np.zeros(columns)
+        self.mean = np.zeros(columns)
+        self.m2 = np.zeros(columns)
+        self.m3 = np.zeros(columns)
+        self.m4 = np.zeros(columns)
+        self.min = np.full(columns, np.inf)
+        self.max = np.full(columns, -np.inf)
+
+    def update(self, values: np.ndarray, valid: np.ndarray) -> None:
+        """Добавляет партию (строки × столбцы); `valid` отмечает непропущенные значения."""
+        n_b = valid.sum(axis=0).astype(float)
+        safe_n = np.maximum(n_b, 1)
+        filled = np.where(valid, values, 0.0)
+        mean_b = filled.sum(axis=0) / safe_n
+        deviation = np.where(valid, values - mean_b, 0.0)
+        squared = deviation ** 2
+        m2_b = squared.sum(axis=0)
+        m3_b = (squared * deviation).sum(axis=0)
+        m4_b = (squared ** 2).sum(axis=0)
+        self.min = np.fmin(self.min, np.where(valid, values, np.inf).min(axis=0, initial=np.inf))
+        self.max = np.fmax(self.max, np.where(valid, values, -np.inf).max(axis=0,
+                                                                         initial=-np.inf))
+
+        n_a = self.n
+        n = n_a + n_b
+        safe_total = np.maximum(n, 1)
+        delta = mean_b - self.mean
+        delta_n = delta / safe_total
+        self.m4 = (self.m4 + m4_b
+                   + delta * delta_n ** 3 * n_a * n_b * (n_a ** 2 - n_a * n_b + n_b ** 2)
+                   + 6 * delta_n ** 2 * (n_a ** 2 * m2_b + n_b ** 2 * self.m2)
+                   + 4 * delta_n * (n_a * m3_b - n_b * self.m3))
+        self.m3 = (self.m3 + m3_b
+                   + delta * delta_n ** 2 * n_a * n_b * (n_a - n_b)
+                   + 3 * delta_n * (n_a * m2_b - n_b * self.m2))
+        self.m2 = self.m2 + m2_b + delta * delta_n * n_a * n_b
+        self.mean = self.mean + delta_n * n_b
+        self.n = n
+
+    def summary(self, index: int) -> dict:
+        """Возвращает статистики столбца в тех же определениях, что и pandas."""
+        n, m2, m3, m4 = self.n[index], self.m2[index], self.m3[index], self.m4[index]
+        std = math.sqrt(m2 / (n - 1)) if n > 1 else float("nan")
+        skewness = kurtosis = float("nan")
+        if n > 2 and m2 > 0:
+            g1 = math.sqrt(n) * m3 / m2 ** 1.5
+            skewness = math.sqrt(n * (n - 1)) / (n - 2) * g1
+        if n > 3 and m2 > 0:
+            g2 = n * m4 / m2 ** 2 - 3
+            kurtosis = ((n + 1) * g2 + 6) * (n - 1) / ((n - 2) * (n - 3))
+        return {
+            "count": int(n),
+            "mean": self.mean[index] if n else float("nan"),
+            "std": std,
+            "min": self.min[index] if n else float("nan"),
+            "max": self.max[index] if n else float("nan"),
+            "skewness": skewness,
+            "kurtosis": kurtosis,
+        }
+
+
+class BinnedQuantiles:
+    """Приближённые квантили по гистограмме с фиксированными границами.
+
+    Границы берутся из статистик parquet, поэтому гистограмма строится за тот же проход.
+    Значения за границами (если статистик нет) попадают в крайние корзины. Значения, равные
+    минимуму, считаются отдельно: у столбцов с долей нулей (осадки) квантили не сдвигаются
+    внутрь первой корзины.
+    """
+
+    def __init__(self, lower: np.ndarray, upper: np.ndarray, bins: int = HISTOGRAM_BINS):
+        self.bins = bins
+        self.lower = lower
+        self.width = np.where(upper > lower, upper - lower, 1.0) / bins
+        self.counts = np.zeros((len(lower), bins), dtype=np.int64)
+        self.min_value = np.full(len(lower), np.inf)
+        self.at_min = np.zeros(len(lower), dtype=np.int64)
+
+    def update(self, values: np.ndarray, valid: np.ndarray) -> None:
+        """Добавляет партию одним bincount по всем столбцам."""
+        scaled = np.where(valid, (values - self.lower) / self.width, 0.0)
+        bin_index = np.clip(scaled, 0, self.bins - 1).astype(np.intp)
+        flat_index = (bin_index + np.arange(values.shape[1]) * self.bins)[valid]
+        self.counts += np.bincount(flat_index, minlength=self.counts.size).reshape(
+            self.counts.shape
+        )
+        batch_min = np.where(valid, values, np.inf).min(axis=0)
+        at_batch_min = ((values == batch_min) & valid).sum(axis=0)
+        self.at_min = np.where(batch_min < self.min_value, at_batch_min,
+                               self.at_min + np.where(batch_min == self.min_value,
+                                                      at_batch_min, 0))
+        self.min_value = np.minimum(self.min_value, batch_min)
+
+    def quantiles(self, index: int, probabilities, low: float, high: float) -> dict:
+        """Оценивает квантили с линейной интерполяцией внутри корзины (как pandas)."""
+        counts = self.counts[index]
+        total = counts.sum()
+        if total == 0:
+            return {str(q): float("nan") for q in probabilities}
+        cumulative = np.cumsum(counts)
+        at_min = self.at_min[index]
+        min_bin = int(np.clip((self.min_value[index] - self.lower[index]) / self.width[index],
+                              0, self.bins - 1))
+        result = {}
+        for q in probabilities:
+            rank = q * (total - 1)
+            if rank <= at_min - 1:
+                # Обе соседние позиции заняты минимумом — квантиль точно равен ему
+                result[str(q)] = float(self.min_value[index])
+                continue
+            bin_number = int(np.searchsorted(cumulative, rank, side="right"))
+            before = cumulative[bin_number - 1] if bin_number else 0
+            in_bin = counts[bin_number]
+            if bin_number == min_bin:
+                # Значения, равные минимуму, стоят в начале корзины и уже учтены выше
+                before += at_min
+                in_bin -= at_min
+            fraction = max(rank - before, 0) / in_bin if in_bin else 0.0
+            estimate = self.lower[index] + (bin_number + fraction) * self.width[index]
+            result[str(q)] = float(np.clip(estimate, low, high))
+        return result
+
+
+class PairwiseCorrelation:
+    """Корреляция Пирсона по парам непропущенных значений (как `DataFrame.corr`).
+
+    Суммы по парам накапливаются матричными произведениями маски и значений; значения
+    сдвигаются к среднему первой партии, чтобы суммы квадратов не теряли точность.
+    """
+
+    def __init__(self, columns: int):
+        shape = (columns, columns)
+        self.shift = None
+        self.n = np.zeros(shape)
+        self.sum_x = np.zeros(shape)
+        self.sum_xx = np.zeros(shape)
+        self.sum_xy = np.zeros(shape)
+
+    def update(self, values: np.ndarray, valid: np.ndarray, shift: np.ndarray) -> None:
+        """Добавляет партию; `shift` (например, среднее первой партии) фиксируется один раз."""
+        if self.shift is None:
+            self.shift = shift
+        mask = valid.astype(float)
+        centered = np.where(valid, values - self.shift, 0.0)
+        self.n += mask.T @ mask
+        self.sum_x += centered.T @ mask  # [i, j]: сумма x_i по строкам, где известны x_i и x_j
+        self.sum_xx += (centered ** 2).T @ mask
+        self.sum_xy += centered.T @ centered
+
+    def matrix(self) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = self.n * self.sum_xy - self.sum_x * self.sum_x.T
+            var = self.n * self.sum_xx - self.sum_x ** 2
+            corr = cov / np.sqrt(var * var.T)
+        corr[(self.n < 2) | (var <= 0) | (var.T <= 0)] = np.nan
+        return np.clip(corr, -1, 1)
+
+
+class DuplicateCounter:
+    """Считает повторы ключа по 64-битным хешам, разложенным по файлам-партициям.
+
+    В памяти одновременно находится только одна партиция (около 8 байт × строк / партиций).
+    Вероятность ложного совпадения хешей для 30 млн строк — порядка 1e-5.
+    """
+
+    def __init__(self, directory: str, partitions: int = DUPLICATE_PARTITIONS):
+        self.partitions = partitions
+        self.paths = [Path(directory) / f"keys_{i:03d}.bin" for i in range(partitions)]
+        self._stack = ExitStack()
+        self._files = [self._stack.enter_context(open(path, "wb")) for path in self.paths]
+
+    def update(self, keys: pd.DataFrame) -> None:
+        hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+        partition = (hashes % np.uint64(self.partitions)).astype(np.intp)
+        order = np.argsort(partition, kind="stable")
+        bounds = np.cumsum(np.bincount(partition, minlength=self.partitions))
+        for number, chunk in enumerate(np.split(hashes[order], bounds[:-1])):
+            if len(chunk):
+                chunk.tofile(self._files[number])
+
+    def count(self) -> int:
+        """Возвращает число строк, повторяющих уже встреченный ключ (как `duplicated().sum()`)."""
+        self._stack.close()
+        duplicates = 0
+        for path in self.paths:
+            hashes = np.fromfile(path, dtype=np.uint64)
+            duplicates += len(hashes) - len(np.unique(hashes))
+        return duplicates
+
+
+def _data_columns(parquet_file: pq.ParquetFile) -> list[str]:
+    """Возвращает столбцы данных без служебного индекса, сохранённого pandas."""
+    metadata = parquet_file.schema_arrow.pandas_metadata or {}
+    index_columns = {col for col in metadata.get("index_columns", []) if isinstance(col, str)}
+    return [name for name in parquet_file.schema_arrow.names if name not in index_columns]
+
+
+def _statistics_bounds(parquet_file: pq.ParquetFile, column: str) -> tuple[float, float] | None:
+    """Возвращает минимум и максимум столбца по статистикам групп строк parquet."""
+    metadata = parquet_file.metadata
+    position = parquet_file.schema_arrow.get_field_index(column)
+    lows, highs = [], []
+    for group in range(metadata.num_row_groups):
+        chunk = metadata.row_group(group).column(position)
+        statistics = chunk.statistics
+        if statistics is None or not statistics.has_min_max:
+            if statistics is not None and statistics.null_count == chunk.num_values:
+                continue  # В группе только пропуски
+            return None
+        lows.append(statistics.min)
+        highs.append(statistics.max)
+    if not lows:
+        return None
+    low, high = float(min(lows)), float(max(highs))
+    return (low, high) if math.isfinite(low) and math.isfinite(high) else None
+
+
+def _json_value(value):
+    """Приводит значение к виду, допустимому в JSON (NaN -> null, numpy -> python)."""
+    if isinstance(value, dict):
+        return {str(key): _json_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_value(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, (date, pd.Timestamp)):
+        return value.isoformat()
+    return value
+
+
+def profile_parquet(
+    path: str | Path = PARQUET_PATH,
+    batch_size: int = CHUNK_SIZE,
+    spill_dir: str | None = None,
+) -> dict:
+    """Строит профиль данных за один проход по группам строк parquet.
+
+    Считает пропуски, моменты, приближённые квантили, матрицу корреляций, частоты
+    строковых значений и повторы ключа (city_name, date). Память ограничена размером
+    партии, гистограммами и одной партицией хешей ключей.
+    """
+    start = time.perf_counter()
+    parquet_file = pq.ParquetFile(path)
+    columns = _data_columns(parquet_file)
+    schema = parquet_file.schema_arrow
+    numeric = [col for col in columns if pa.types.is_integer(schema.field(col).type)
+               or pa.types.is_floating(schema.field(col).type)]
+    temporal = [col for col in columns if pa.types.is_temporal(schema.field(col).type)]
+    categorical = [col for col in columns if col not in numeric and col not in temporal]
+    logger.info(f"Профилирование {path}: {parquet_file.metadata.num_rows} строк, "
+                f"{parquet_file.metadata.num_row_groups} групп строк, {len(columns)} столбцов")
+
+    bounds = [_statistics_bounds(parquet_file, col) for col in numeric]
+    missing_bounds = [col for col, bound in zip(numeric, bounds) if bound is None]
+    if missing_bounds:
+        logger.warning(f"Нет статистик parquet для {missing_bounds}, границы квантилей "
+                       f"берутся из первой партии")
+
+    rows = 0
+    rows_with_missing = 0
+    missing = Counter({col: 0 for col in columns})
+    moments = Moments(len(numeric))
+    correlation = PairwiseCorrelation(len(numeric))
+    histogram = None
+    value_counts: dict[str, Counter | None] = {col: Counter() for col in categorical}
+    temporal_range = {col: [None, None] for col in temporal}
+    check_duplicates = all(key in columns for key in DUPLICATE_KEYS)
+
+    with tempfile.TemporaryDirectory(dir=spill_dir, prefix="profile_") as directory:
+        duplicates = DuplicateCounter(directory) if check_duplicates else None
+        for batch_number, batch in enumerate(
+            parquet_file.iter_batches(batch_size=batch_size, columns=columns), start=1
+        ):
+            rows += batch.num_rows
+            any_missing = np.zeros(batch.num_rows, dtype=bool)
+            for col in columns:
+                is_missing = pc.is_null(batch.column(col), nan_is_null=True)
+                missing[col] += pc.sum(is_missing).as_py() or 0
+                any_missing |= is_missing.to_numpy(zero_copy_only=False)
+            rows_with_missing += int(any_missing.sum())
+
+            if numeric:
+                values = np.column_stack([
+                    batch.column(col).to_numpy(zero_copy_only=False).astype(float)
+                    for col in numeric
+                ])
+                valid = ~np.isnan(values)
+                moments.update(values, valid)
+                if histogram is None:
+                    # После первой партии моменты содержат её минимум, максимум и среднее
+                    first_low, first_high = (np.where(np.isfinite(edge), edge, 0.0)
+                                             for edge in (moments.min, moments.max))
+                    histogram = BinnedQuantiles(
+                        np.array([b[0] if b else first_low[i] for i, b in enumerate(bounds)]),
+                        np.array([b[1] if b else first_high[i] for i, b in enumerate(bounds)]),
+                    )
+                histogram.update(values, valid)
+                correlation.update(values, valid, shift=moments.mean.copy())
+
+            for col in categorical:
+                if value_counts[col] is None:
+                    continue
+                counts = pc.value_counts(batch.column(col)).to_pylist()
+                value_counts[col].update({item["values"]: item["counts"] for item in counts
+                                          if item["values"] is not None})
+                if len(value_counts[col]) > MAX_TRACKED_VALUES:
+                    logger.info(f"Столбец {col}: больше {MAX_TRACKED_VALUES} значений, "
+                                f"частоты не считаются")
+                    value_counts[col] = None
+
+            for col in temporal:
+                low, high = (value.as_py() for value in pc.min_max(batch.column(col)).values())
+                if low is not None:
+                    current_low, current_high = temporal_range[col]
+                    temporal_range[col] = [
+                        low if current_low is None else min(current_low, low),
+                        high if current_high is None else max(current_high, high),
+                    ]
+
+            if duplicates is not None:
+                duplicates.update(batch.select(list(DUPLICATE_KEYS)).to_pandas())
+            logger.info(f"Обработана партия {batch_number}: всего {rows} строк")
+
+        duplicate_count = duplicates.count() if duplicates is not None else None
+
+    column_profiles = {}
+    for col in columns:
+        column_profile = {
+            "dtype": str(schema.field(col).type),
+            "missing": missing[col],
+            "missing_percent": missing[col] / rows * 100 if rows else 0.0,
+        }
+        if col in numeric:
+            index = numeric.index(col)
+            stats = moments.summary(index)
+            stats["quantiles"] = histogram.quantiles(index, QUANTILES, stats["min"], stats["max"])
+            column_profile.update(stats)
+        elif col in temporal:
+            column_profile.update(min=temporal_range[col][0], max=temporal_range[col][1])
+        else:
+            counts = value_counts[col]
+            column_profile.update(
+                unique=len(counts) if counts is not None else None,
+                top=dict(counts.most_common(TOP_VALUES)) if counts is not None else None,
+            )
+        column_profiles[col] = column_profile
+
+    duration = time.perf_counter() - start
+    logger.info(f"Профиль построен за {duration:.1f} с")
+    return _json_value({
+        "source": str(path),
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "duration_s": duration,
+        "rows": rows,
+        "row_groups": parquet_file.metadata.num_row_groups,
+        "rows_with_missing": rows_with_missing,
+        "columns": column_profiles,
+        "correlation": {"columns": numeric, "matrix": correlation.matrix().tolist()},
+        "duplicates": {"keys": list(DUPLICATE_KEYS), "count": duplicate_count},
+    })
+
+
+def save_profile(profile: dict, path: str | Path = PROFILE_PATH) -> None:
+    """Атомарно сохраняет профиль в JSON для отображения в дашборде."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, ensure_ascii=False, indent=2, allow_nan=False)
+    os.replace(tmp_path, path)
+    logger.info(f"Профиль сохранён в {path}")
+
+
+if __name__ == "__main__":
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Профилирование данных о погоде за один проход")
+    parser.add_argument("--input", default=str(PARQUET_PATH), help="parquet-файл с данными")
+    parser.add_argument("--output", default=str(PROFILE_PATH), help="JSON-файл профиля")
+    parser.add_argument("--batch-size", type=int, default=CHUNK_SIZE,
+                        help="количество строк в партии")
+    parser.add_argument("--spill-dir", default=None,
+                        help="каталог для временных файлов проверки дубликатов")
+    args = parser.parse_args()
+    save_profile(profile_parquet(args.input, args.batch_size, args.spill_dir), args.output)
@@ -1,56 +1,89 @@
+import argparse
+
 import pandas as pd
+import pyarrow.parquet as pq
+from data_profiling import profile_parquet, save_profile
+from utils.constants import PARQUET_PATH
+from utils.logging_config import setup_logging
 
 
-df = pd.read_parquet("data/daily_weather.parquet")
+# Профиль строится за один проход по партиям, весь датасет в память не загружается
+setup_logging()
+parser = argparse.ArgumentParser(description="Подробный вывод профиля датасета в консоль")
+parser.add_argument("--save", action="store_true",
+                    help="сохранить профиль в data/profile.json (как make profile-data)")
+args = parser.parse_args()
+profile = profile_parquet(PARQUET_PATH)
+if args.save:
+    save_profile(profile)
+columns = profile["columns"]
+numeric_cols = profile["correlation"]["columns"]
 
 
 print("=== Основная информация о датасете ===")
-print(f"Размер датасета: {df.shape}")
+print(f"Размер датасета: {(profile['rows'], len(columns))}")
 print("\nПервые 5 строк:")
-print(df.head())
+print(next(pq.ParquetFile(PARQUET_PATH).iter_batches(batch_size=5, columns=list(columns)))
+      .to_pandas())
 print("\nТипы данных:")
-print(df.dtypes)
-print("\nСтолбцы:", list(df.columns))
+print(pd.Series({col: stats["dtype"] for col, stats in columns.items()}))
+print("\nСтолбцы:", list(columns))
 
 
 print("\n=== Диапазон дат ===")
-print(f"Минимальная дата: {df['date'].min()}")
-print(f"Максимальная дата: {df['date'].max()}")
+print(f"Минимальная дата: {columns['date']['min']}")
+print(f"Максимальная дата: {columns['date']['max']}")
 
 
 print("\n=== Пропуски в данных ===")
-missing = df.isna().sum()
-missing_percent = (missing / len(df) * 100).round(2)
-missing_df = pd.DataFrame({'Пропуски': missing, 'Процент': missing_percent})
+missing_df = pd.DataFrame({
+    'Пропуски': {col: stats["missing"] for col, stats in columns.items()},
+    'Процент': {col: round(stats["missing_percent"], 2) for col, stats in columns.items()},
+})
 print(missing_df[missing_df['Пропуски'] > 0])
-print(f"\nВсего строк с хотя бы одним пропуском: {df.isna().any(axis=1).sum()}")
+print(f"\nВсего строк с хотя бы одним пропуском: {profile['rows_with_missing']}")
 
 
-numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns
 print("\n=== Базовые статистики для числовых столбцов ===")
-print(df[numeric_cols].describe().round(2))
+describe = pd.DataFrame({
+    col: {
+        "count": columns[col]["count"],
+        "mean": columns[col]["mean"],
+        "std": columns[col]["std"],
+        "min": columns[col]["min"],
+        "25%": columns[col]["quantiles"]["0.25"],
+        "50%": columns[col]["quantiles"]["0.5"],
+        "75%": columns[col]["quantiles"]["0.75"],
+        "max": columns[col]["max"],
+    }
+    for col in numeric_cols
+}, dtype=float)
+print(describe.round(2))
+print("Квантили оценены по гистограмме, погрешность — не больше ширины корзины")
 
 
 print("\n=== Уникальные значения ===")
-print(f"Количество уникальных городов: {df['city_name'].nunique()}")
-print(f"Уникальные сезоны: {df['season'].unique()}")
+print(f"Количество уникальных городов: {columns['city_name']['unique']}")
+print(f"Уникальные сезоны: {list(columns['season']['top'])}")
 print("\nЧастота сезонов:")
-print(df['season'].value_counts())
+print(pd.Series(columns['season']['top'], name="count"))
 
 
 print("\n=== Проверка экстремальных значений ===")
 for col in numeric_cols:
+    stats = columns[col]
     print(f"\nСтолбец: {col}")
-    print(f"Минимальное: {df[col].min()}")
-    print(f"Максимальное: {df[col].max()}")
-    print(f"Среднее: {df[col].mean():.2f}")
-    print(f"Медиана: {df[col].median():.2f}")
+    print(f"Минимальное: {stats['min']}")
+    print(f"Максимальное: {stats['max']}")
+    print(f"Среднее: {stats['mean']:.2f}" if stats['mean'] is not None else "Среднее: нет данных")
+    median = stats['quantiles']['0.5']
+    print(f"Медиана (≈): {median:.2f}" if median is not None else "Медиана: нет данных")
 
 
 print("\n=== Корреляция между числовыми столбцами ===")
-print(df[numeric_cols].corr().round(2))
+print(pd.DataFrame(profile["correlation"]["matrix"], index=numeric_cols, columns=numeric_cols,
+                   dtype=float).round(2))
 
 
 print("\n=== Проверка дубликатов ===")
-duplicates = df.duplicated(subset=['city_name', 'date']).sum()
-print(f"Количество дубликатов (по городу и дате): {duplicates}")
+print(f"Количество дубликатов (по городу и дате): {profile['duplicates']['count']}")
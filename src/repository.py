@@ -1,11 +1,13 @@
 import io
+import json
 import pandas as pd
 import streamlit as st
 from sqlalchemy import create_engine, select, and_, Table, MetaData
 from sqlalchemy.orm import Session
 from pathlib import Path
 import logging
-from utils.constants import LIMIT_WEATHER_RECORDS
+from utils.constants import LIMIT_WEATHER_RECORDS, PROFILE_PATH
+from utils.tracing import traced, mark_cache_miss
 
 logger = logging.getLogger(__name__)
 
@@ -28,9 +30,11 @@ except Exception as e:
     logger.error(f"Ошибка при загрузке таблиц из базы данных: {e}")
     raise
 
+@traced("repository.get_countries", cached=True)
 @st.cache_data
 def get_countries() -> pd.DataFrame:
     """Возвращает данные о странах."""
+    mark_cache_miss()
     logger.info("Загрузка данных о странах")
     with Session(engine) as session:
         stmt = select(countries_table)
@@ -39,9 +43,11 @@ def get_countries() -> pd.DataFrame:
     return df
 
 
+@traced("repository.get_cities", cached=True)
 @st.cache_data
 def get_cities(countries: list[str] | None = None) -> pd.DataFrame:
     """Возвращает данные о городах, возможно отфильтрованные по странам."""
+    mark_cache_miss()
     logger.info(f"Загрузка данных о городах с фильтром по странам: {countries}")
     with Session(engine) as session:
         stmt = select(cities_table)
@@ -52,26 +58,51 @@ def get_cities(countries: list[str] | None = None) -> pd.DataFrame:
     return df
 
 
+@traced("repository.resolve_cities", cached=True)
+@st.cache_data
+def resolve_cities(
+    countries: list[str] | None = None,
+    cities: list[str] | None = None
+) -> list[str]:
+    """Возвращает выбранные города, а если их нет — все города выбранных стран."""
+    mark_cache_miss()
+    if cities:
+        return list(cities)
+    if not countries:
+        return []
+    with Session(engine) as session:
+        stmt = select(cities_table.c.city_name).where(cities_table.c.country.in_(countries))
+        cities_df = pd.read_sql(stmt, session.bind)
+    return cities_df["city_name"].tolist()
+
+
+@traced("repository.get_weather", cached=True)
 @st.cache_data
 def get_weather(
     countries: list[str] | None = None,
     cities: list[str] | None = None,
     seasons: list[str] | None = None,
     start_date=None,
-    end_date=None
+    end_date=None,
+    limit: int | None = LIMIT_WEATHER_RECORDS
 ) -> pd.DataFrame:
-    """Возвращает данные о погоде с фильтрами."""
+    """Кэшируемая выборка данных о погоде для дашборда."""
+    mark_cache_miss()
+    return query_weather(countries, cities, seasons, start_date, end_date, limit)
+
+
+def query_weather(
+    countries: list[str] | None = None,
+    cities: list[str] | None = None,
+    seasons: list[str] | None = None,
+    start_date=None,
+    end_date=None,
+    limit: int | None = LIMIT_WEATHER_RECORDS
+) -> pd.DataFrame:
+    """Возвращает данные о погоде с фильтрами (не более `limit` записей, None — без ограничения)."""
     logger.info("Начало загрузки данных о погоде")
     with Session(engine) as session:
-        final_cities = set()
-        if cities:
-            final_cities.update(cities)
-        elif countries:
-            cities_stmt = select(
-                cities_table.c.city_name
-            ).where(cities_table.c.country.in_(countries))
-            cities_df = pd.read_sql(cities_stmt, session.bind)
-            final_cities.update(cities_df["city_name"].tolist())
+        final_cities = set(resolve_cities(countries, cities))
 
         stmt = select(weather_table)
         conditions = []
@@ -90,7 +121,8 @@ def get_weather(
         if conditions:
             stmt = stmt.where(and_(*conditions))
 
-        stmt = stmt.limit(LIMIT_WEATHER_RECORDS)
+        if limit:
+            stmt = stmt.limit(limit)
 
         logger.info(f"Выполняется запрос с фильтрами: cities={len(final_cities)}, "
                     f"seasons={seasons}, start_date={start_date}, end_date={end_date}")
@@ -106,9 +138,11 @@ def get_weather(
     return df
 
 
+@traced("repository.get_weather_for_map", cached=True)
 @st.cache_data
-def get_weather_for_map(date, metric: str) -> pd.DataFrame:
-    """Загружает данные о погоде для карты."""
+def get_weather_for_map(date, metric: str, cities: tuple[str, ...] | None = None) -> pd.DataFrame:
+    """Загружает данные о погоде для карты, возможно только для видимых городов."""
+    mark_cache_miss()
     logger.info(f"Загрузка данных о погоде для карты на дату: {date} и метрику: {metric}")
     with Session(engine) as session:
         stmt = select(
@@ -118,6 +152,8 @@ def get_weather_for_map(date, metric: str) -> pd.DataFrame:
         ).where(
             weather_table.c.date == pd.to_datetime(date).strftime('%Y-%m-%d')
         )
+        if cities is not None:
+            stmt = stmt.where(weather_table.c.city_name.in_(cities))
         logger.info(f"Выполняется запрос для карты с параметром date={date}")
         try:
             df = pd.read_sql(stmt, session.bind)
@@ -130,10 +166,29 @@ def get_weather_for_map(date, metric: str) -> pd.DataFrame:
     return df
 
 
-def to_excel(df: pd.DataFrame, index: bool = False, sheet_name: str = "WeatherData") -> bytes:
+def dataframe_to_excel(
+    df: pd.DataFrame, index: bool = False, sheet_name: str = "WeatherData"
+) -> bytes:
     """Конвертирует DataFrame в Excel."""
     output = io.BytesIO()
     with pd.ExcelWriter(output, engine="openpyxl") as writer:
         df.to_excel(writer, index=index, sheet_name=sheet_name)
     output.seek(0)
     return output.getvalue()
+
+
+@traced("repository.read_data_profile", cached=True)
+@st.cache_data
+def read_data_profile(modified_at: float) -> dict:
+    """Читает профиль данных (кэшируется до изменения файла)."""
+    mark_cache_miss()
+    logger.info(f"Загрузка профиля данных из {PROFILE_PATH}")
+    with open(PROFILE_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def get_data_profile() -> dict | None:
+    """Возвращает профиль данных, построенный data_profiling.py, или None, если его нет."""
+    if not PROFILE_PATH.exists():
+        return None
+    return read_data_profile(PROFILE_PATH.stat().st_mtime)
@@ -0,0 +1,213 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from sqlalchemy import bindparam, inspect, text
+from repository import engine, resolve_cities
+from services.comparison_aggregates import (MONTHLY_AGGREGATES, MONTHLY_TABLE, SECTOR_COLUMNS,
+                                            TEMPERATURE_BINS_PER_DEGREE, TEMPERATURE_TABLE,
+                                            monthly_sql, temperature_sql)
+from services.metrics_calculator import WIND_DIRECTION_LABELS
+from utils.tracing import traced, mark_cache_miss
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Уровни сравнения: город или страна
+COMPARISON_GROUPS = ("city_name", "country")
+
+# Целые месяцы периода берутся из помесячных агрегатов (data_loaders.load_comparison_aggregates),
+# неполные месяцы на краях периода — из weather тем же запросом; без таблиц агрегатов весь период
+# считается по weather. Итог по городу складывается из помесячных значений, по стране — в pandas.
+_COMPARISON_SQL = """
+SELECT city_name, {merged}
+FROM ({parts})
+GROUP BY city_name
+"""
+
+# Гистограмма каждой части группируется отдельно: таблица хранится в порядке (город, корзина),
+# поэтому её группировка обходится без сортировки
+_TEMPERATURE_SQL = """
+SELECT city_name, temp_bin, SUM(count) AS count
+FROM ({part})
+GROUP BY city_name, temp_bin
+"""
+
+# Страна города; города с одинаковым названием сводятся к одной записи
+_COUNTRIES_SQL = "SELECT city_name, MIN(country) AS country FROM cities GROUP BY city_name"
+
+COMPARISON_COLUMNS = [
+    "observations", "avg_temp", "median_temp", "precip_days", "avg_wind_speed",
+    "min_temp", "max_temp", "extreme_temp_diff", "wind_direction_mode", "max_wind_gust",
+    "avg_precip", "rain_days", "snow_days", "temp_precip_corr",
+]
+
+
+def _correlation_from_sums(df: pd.DataFrame) -> pd.Series:
+    """Рассчитывает коэффициент Пирсона по суммам, накопленным в SQL."""
+    n = df["pair_n"].astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = df["sum_tp"] - df["sum_t"] * df["sum_p"] / n
+        var_t = df["sum_tt"] - df["sum_t"] ** 2 / n
+        var_p = df["sum_pp"] - df["sum_p"] ** 2 / n
+        corr = cov / np.sqrt(var_t * var_p)
+    return corr.where((n > 1) & (var_t > 0) & (var_p > 0)).clip(-1, 1)
+
+
+def has_comparison_aggregates() -> bool:
+    """Проверяет, построены ли таблицы агрегатов для сравнения."""
+    tables = inspect(engine)
+    return tables.has_table(MONTHLY_TABLE) and tables.has_table(TEMPERATURE_TABLE)
+
+
+def _split_period(start_date, end_date) -> tuple[tuple | None, list[tuple]]:
+    """Делит период на целые месяцы и неполные месяцы на краях.
+
+    Возвращает диапазон месяцев 'ГГГГ-ММ' (None, если целых месяцев нет; открытая граница —
+    None) и список диапазонов дат для неполных месяцев.
+    """
+    start = pd.to_datetime(start_date) if start_date else None
+    end = pd.to_datetime(end_date) if end_date else None
+    first = None if start is None else start.to_period("M") + int(start.day > 1)
+    last = None if end is None else end.to_period("M") - int(end.day < end.days_in_month)
+    if first is not None and last is not None and first > last:
+        return None, [(start, end)]
+    edges = []
+    if start is not None and start.day > 1:
+        edges.append((start, start + pd.offsets.MonthEnd(0)))
+    if end is not None and end.day < end.days_in_month:
+        edges.append((end.replace(day=1), end))
+    months = tuple(None if month is None else str(month) for month in (first, last))
+    return months, edges
+
+
+def _median_from_histogram(histogram: pd.DataFrame) -> pd.Series:
+    """Рассчитывает медиану по гистограмме (entity, temp_bin, count), как pandas.median."""
+    histogram = histogram.sort_values(["entity", "temp_bin"])
+    counts = histogram.groupby("entity")["count"]
+    cumulative = counts.cumsum()
+    total = counts.transform("sum")
+    # Корзины на позициях (n + 1) // 2 и n // 2 + 1: для нечётного n это одна и та же корзина
+    lower = histogram[cumulative >= (total + 1) // 2].groupby("entity")["temp_bin"].first()
+    upper = histogram[cumulative >= total // 2 + 1].groupby("entity")["temp_bin"].first()
+    return (lower + upper) / (2 * TEMPERATURE_BINS_PER_DEGREE)
+
+
+def query_comparison_metrics(
+    group_by: str = "city_name",
+    cities: list[str] | None = None,
+    seasons: list[str] | None = None,
+    start_date=None,
+    end_date=None,
+) -> pd.DataFrame:
+    """Считает полный набор метрик по каждому городу или стране.
+
+    Возвращает по строке на сущность: столбец `group_by` и столбцы COMPARISON_COLUMNS.
+    Пустой список городов означает все города. Медиана температуры точна до 0.1 °C.
+    """
+    if group_by not in COMPARISON_GROUPS:
+        raise ValueError(f"Неизвестный уровень сравнения: {group_by}")
+
+    conditions = []
+    params = {}
+    if cities:
+        conditions.append("city_name IN :cities")
+        params["cities"] = list(cities)
+    if seasons:
+        conditions.append("season IN :seasons")
+        params["seasons"] = list(seasons)
+
+    if has_comparison_aggregates():
+        months, edges = _split_period(start_date, end_date)
+    else:
+        months, edges = None, [(start_date and pd.to_datetime(start_date),
+                                end_date and pd.to_datetime(end_date))]
+    monthly_parts, temperature_parts = [], []
+    if months is not None:
+        month_conditions = list(conditions)
+        for bound, operator, value in zip(("month_from", "month_to"), (">=", "<="), months):
+            if value is not None:
+                month_conditions.append(f"month {operator} :{bound}")
+                params[bound] = value
+        where = f"WHERE {' AND '.join(month_conditions)}" if month_conditions else ""
+        monthly_parts.append(f"SELECT * FROM {MONTHLY_TABLE} {where}")
+        temperature_parts.append(f"SELECT * FROM {TEMPERATURE_TABLE} {where}")
+    for number, (edge_start, edge_end) in enumerate(edges):
+        edge_conditions = list(conditions)
+        for bound, operator, value in ((f"start_{number}", ">=", edge_start),
+                                       (f"end_{number}", "<=", edge_end)):
+            if value is not None:
+                edge_conditions.append(f"date {operator} :{bound}")
+                params[bound] = value.strftime('%Y-%m-%d')
+        monthly_parts.append(monthly_sql(edge_conditions))
+        temperature_parts.append(temperature_sql(edge_conditions))
+
+    statements = [
+        text(_COMPARISON_SQL.format(
+            merged=", ".join(f"{merge}({column}) AS {column}"
+                             for column, (_, merge) in MONTHLY_AGGREGATES.items()),
+            parts=" UNION ALL ".join(monthly_parts),
+        )),
+        text(" UNION ALL ".join(_TEMPERATURE_SQL.format(part=part)
+                                for part in temperature_parts)),
+    ]
+    for name in ("cities", "seasons"):
+        if name in params:
+            statements = [stmt.bindparams(bindparam(name, expanding=True))
+                          for stmt in statements]
+
+    logger.info(f"Запрос сравнения: group_by={group_by}, cities={len(cities or [])}, "
+                f"seasons={seasons}, start_date={start_date}, end_date={end_date}, "
+                f"months={months}, edges={len(edges)}")
+    with engine.connect() as conn:
+        df = pd.read_sql(statements[0], conn, params=params)
+        histogram = pd.read_sql(statements[1], conn, params=params)
+        countries = (pd.read_sql(text(_COUNTRIES_SQL), conn).set_index("city_name")["country"]
+                     if group_by == "country" else None)
+
+    if countries is None:
+        df = df.rename(columns={"city_name": "entity"})
+        histogram = histogram.rename(columns={"city_name": "entity"})
+    else:
+        # Города без страны в сравнение стран не входят
+        df = df.assign(entity=df["city_name"].map(countries)).dropna(subset=["entity"])
+        df = df.groupby("entity", as_index=False).agg({
+            column: merge.lower() for column, (_, merge) in MONTHLY_AGGREGATES.items()
+        })
+        histogram = histogram.assign(entity=histogram["city_name"].map(countries))
+    histogram = histogram.groupby(["entity", "temp_bin"], as_index=False)["count"].sum()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        df["avg_temp"] = df["temp_sum"] / df["temp_n"]
+        df["precip_days"] = 100.0 * df["precip_day_n"] / df["observations"]
+        df["avg_wind_speed"] = df["wind_sum"] / df["wind_n"]
+        df["avg_precip"] = df["precip_sum"] / df["precip_n"]
+    df = df.rename(columns={"temp_min": "min_temp", "temp_max": "max_temp"})
+    df["extreme_temp_diff"] = df["extreme_max"] - df["extreme_min"]
+    df["median_temp"] = df["entity"].map(_median_from_histogram(histogram))
+    df["temp_precip_corr"] = _correlation_from_sums(df)
+    # При равенстве — сектор с меньшим номером, как argmax в calculate_wind_direction_mode
+    sectors = df[SECTOR_COLUMNS].fillna(0).to_numpy()
+    df["wind_direction_mode"] = [
+        WIND_DIRECTION_LABELS[sector] if count else "Нет данных"
+        for sector, count in zip(sectors.argmax(axis=1), sectors.max(axis=1, initial=0))
+    ]
+    df = df.rename(columns={"entity": group_by})[[group_by, *COMPARISON_COLUMNS]]
+    logger.info(f"Сравнение рассчитано: {len(df)} сущностей")
+    return df
+
+
+@traced("comparison.get_comparison_metrics", cached=True)
+@st.cache_data
+def get_comparison_metrics(
+    group_by: str = "city_name",
+    countries: list[str] | None = None,
+    cities: list[str] | None = None,
+    seasons: list[str] | None = None,
+    start_date=None,
+    end_date=None,
+) -> pd.DataFrame:
+    """Кэшируемое сравнение для дашборда с теми же фильтрами, что и `get_weather`."""
+    mark_cache_miss()
+    return query_comparison_metrics(
+        group_by, resolve_cities(countries, cities), seasons, start_date, end_date
+    )
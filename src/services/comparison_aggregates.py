@@ -0,0 +1,73 @@
+from services.wind_statistics import sector_sql
+
+# Помесячные агрегаты для сравнения городов и стран. Таблицы строит data_loaders, а запрос
+# сравнения складывает из них целые месяцы периода и досчитывает по weather неполные края.
+MONTHLY_TABLE = "comparison_monthly"
+TEMPERATURE_TABLE = "comparison_temperature"
+COMPARISON_SECTORS = 8  # Секторы направления ветра, как WIND_DIRECTION_LABELS
+TEMPERATURE_BINS_PER_DEGREE = 10  # Корзины гистограммы по 0.1 °C — точность исходных данных
+
+SECTOR_COLUMNS = [f"sector_{sector}" for sector in range(COMPARISON_SECTORS)]
+
+# Столбец -> (агрегат по строкам weather, функция объединения помесячных значений)
+MONTHLY_AGGREGATES = {
+    "observations": ("COUNT(*)", "SUM"),
+    "temp_n": ("COUNT(avg_temp_c)", "SUM"),
+    "temp_sum": ("SUM(avg_temp_c)", "SUM"),
+    "temp_min": ("MIN(avg_temp_c)", "MIN"),
+    "temp_max": ("MAX(avg_temp_c)", "MAX"),
+    "extreme_min": ("MIN(min_temp_c)", "MIN"),
+    "extreme_max": ("MAX(max_temp_c)", "MAX"),
+    "precip_day_n": ("SUM(precipitation_mm > 0 OR snow_depth_mm > 0)", "SUM"),
+    "wind_n": ("COUNT(avg_wind_speed_kmh)", "SUM"),
+    "wind_sum": ("SUM(avg_wind_speed_kmh)", "SUM"),
+    "max_wind_gust": ("MAX(peak_wind_gust_kmh)", "MAX"),
+    "precip_n": ("COUNT(precipitation_mm)", "SUM"),
+    "precip_sum": ("SUM(precipitation_mm)", "SUM"),
+    "rain_days": ("SUM(precipitation_mm > 0)", "SUM"),
+    "snow_days": ("SUM(snow_depth_mm > 0)", "SUM"),
+    # Суммы для корреляции по парам, где известны обе величины (как в pandas.corr)
+    "pair_n": ("SUM(pair)", "SUM"),
+    "sum_t": ("SUM(pair * avg_temp_c)", "SUM"),
+    "sum_p": ("SUM(pair * precipitation_mm)", "SUM"),
+    "sum_tt": ("SUM(pair * avg_temp_c * avg_temp_c)", "SUM"),
+    "sum_pp": ("SUM(pair * precipitation_mm * precipitation_mm)", "SUM"),
+    "sum_tp": ("SUM(pair * avg_temp_c * precipitation_mm)", "SUM"),
+    **{column: (f"SUM({sector_sql(sectors=COMPARISON_SECTORS)} = {sector})", "SUM")
+       for sector, column in enumerate(SECTOR_COLUMNS)},
+}
+
+# Сезон входит в ключ таблиц, поэтому пустой сезон хранится как '' (в IN он не попадёт)
+_MONTHLY_SQL = """
+SELECT city_name, substr(date, 1, 7) AS month, COALESCE(season, '') AS season,
+       {aggregates}
+FROM (SELECT *, (avg_temp_c IS NOT NULL AND precipitation_mm IS NOT NULL) AS pair
+      FROM weather {where})
+GROUP BY city_name, month, season
+"""
+
+# Гистограмма температуры: по ней медиана считается без сортировки всех значений
+_TEMPERATURE_SQL = """
+SELECT city_name, substr(date, 1, 7) AS month, COALESCE(season, '') AS season,
+       CAST(ROUND(avg_temp_c * {bins}) AS INTEGER) AS temp_bin, COUNT(*) AS count
+FROM weather
+WHERE avg_temp_c IS NOT NULL {conditions}
+GROUP BY city_name, month, season, temp_bin
+"""
+
+
+def monthly_sql(conditions: list[str] | None = None) -> str:
+    """Возвращает запрос помесячных агрегатов по weather с условиями `conditions`."""
+    return _MONTHLY_SQL.format(
+        aggregates=",\n       ".join(f"{expression} AS {column}"
+                                     for column, (expression, _) in MONTHLY_AGGREGATES.items()),
+        where=f"WHERE {' AND '.join(conditions)}" if conditions else "",
+    )
+
+
+def temperature_sql(conditions: list[str] | None = None) -> str:
+    """Возвращает запрос помесячной гистограммы температуры по weather с условиями `conditions`."""
+    return _TEMPERATURE_SQL.format(
+        bins=TEMPERATURE_BINS_PER_DEGREE,
+        conditions="".join(f" AND {condition}" for condition in conditions or [])
+    )
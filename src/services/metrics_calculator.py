@@ -1,27 +1,36 @@
 import pandas as pd
 import streamlit as st
 from utils.column_names import COLUMN_NAMES, STATISTICS_NAMES, SEASON_NAMES, rename_columns
+from services import wind_statistics
+from utils.tracing import traced, mark_cache_miss
 import logging
 
 logger = logging.getLogger(__name__)
 
+WIND_DIRECTION_LABELS = ["Север", "Сев.-Вост.", "Восток", "Юг.-Вост.",
+                         "Юг", "Юг.-Зап.", "Запад", "Сев.-Зап."]
 
+
+@traced("metrics.calculate_avg_temp")
 def calculate_avg_temp(df: pd.DataFrame) -> float:
     """Рассчитывает среднюю температуру."""
     return df["avg_temp_c"].mean() if not df.empty else 0.0
 
 
+@traced("metrics.calculate_median_temp")
 def calculate_median_temp(df: pd.DataFrame) -> float:
     """Рассчитывает медиану температуры."""
     return df["avg_temp_c"].median() if not df.empty else 0.0
 
 
+@traced("metrics.calculate_precip_days")
 def calculate_precip_days(df: pd.DataFrame) -> float:
     """Рассчитывает долю дней с осадками."""
     days_with_precipitation = df[(df["precipitation_mm"] > 0) | (df["snow_depth_mm"] > 0)]
     return len(days_with_precipitation) / len(df) * 100 if not df.empty else 0.0
 
 
+@traced("metrics.calculate_avg_wind_speed")
 def calculate_avg_wind_speed(df: pd.DataFrame) -> float:
     """Рассчитывает среднюю скорость ветра."""
     return df["avg_wind_speed_kmh"].mean() if not df.empty else 0.0
@@ -30,53 +39,95 @@ def calculate_avg_wind_speed(df: pd.DataFrame) -> float:
 # Дополнительные метрики
 
 
+@traced("metrics.calculate_range_temp")
 def calculate_range_temp(df: pd.DataFrame) -> tuple[float, float]:
     """Рассчитывает диапазон средней температуры."""
     return df["avg_temp_c"].min(), df["avg_temp_c"].max()
 
 
+@traced("metrics.calculate_extreme_temp_diff")
 def calculate_extreme_temp_diff(df: pd.DataFrame) -> float:
     """Рассчитывает разницу между максимальной и минимальной температурой."""
     return df["max_temp_c"].max() - df["min_temp_c"].min() if not df.empty else 0.0
 
 
+@traced("metrics.calculate_avg_precip")
 def calculate_avg_precip(df: pd.DataFrame) -> float:
     """Рассчитывает средний уровень осадков."""
     return df["precipitation_mm"].mean() if not df.empty else 0.0
 
 
+@traced("metrics.calculate_rain_days")
 def calculate_rain_days(df: pd.DataFrame) -> int:
     """Рассчитывает количество дней с дождём."""
     return (df["precipitation_mm"] > 0).sum() if not df.empty else 0
 
 
+@traced("metrics.calculate_snow_days")
 def calculate_snow_days(df: pd.DataFrame) -> int:
     """Рассчитывает количество дней со снегом."""
     return (df["snow_depth_mm"] > 0).sum() if not df.empty else 0
 
 
+@traced("metrics.calculate_wind_direction_mode")
 def calculate_wind_direction_mode(df: pd.DataFrame) -> str:
     """Определяет преобладающее направление ветра."""
-    if df["avg_wind_dir_deg"].dropna().empty:
-        return "Нет данных"
-    bins = [0, 45, 90, 135, 180, 225, 270, 315, 360]
-    labels = ["Север", "Сев.-Вост.", "Восток", "Юг.-Вост.", "Юг", "Юг.-Зап.", "Запад", "Сев.-Зап."]
-    wind_dir = pd.cut(df["avg_wind_dir_deg"], bins=bins, labels=labels, include_lowest=True)
-    return wind_dir.mode()[0] if not wind_dir.mode().empty else "Нет данных"
+    # Секторы центрированы на азимутах, поэтому 350° и 10° считаются одним направлением
+    counts = wind_statistics.sector_counts(df["avg_wind_dir_deg"],
+                                           sectors=len(WIND_DIRECTION_LABELS))
+    return WIND_DIRECTION_LABELS[counts.argmax()] if counts.any() else "Нет данных"
 
 
+@traced("metrics.calculate_max_wind_gust")
 def calculate_max_wind_gust(df: pd.DataFrame) -> float:
     """Определяет максимальную скорость порывов ветра."""
     return df["peak_wind_gust_kmh"].max()
 
 
+@traced("metrics.calculate_temp_precip_corr")
 def calculate_temp_precip_corr(df: pd.DataFrame) -> float:
     """Рассчитывает корреляцию между температурой и осадками."""
     return df[["avg_temp_c", "precipitation_mm"]].corr().iloc[0, 1] if not df.empty else 0.0
 
 
+@traced("metrics.calculate_main_metrics")
+def calculate_main_metrics(df: pd.DataFrame) -> dict:
+    """Рассчитывает ключевые метрики основного дашборда.
+
+    Не кэшируется: хеширование df для ключа кэша дороже самих расчётов.
+    """
+    return {
+        "avg_temp": calculate_avg_temp(df),
+        "median_temp": calculate_median_temp(df),
+        "precip_days": calculate_precip_days(df),
+        "avg_wind_speed": calculate_avg_wind_speed(df),
+    }
+
+
+@traced("metrics.calculate_additional_metrics")
+def calculate_additional_metrics(df: pd.DataFrame) -> dict:
+    """Рассчитывает дополнительные метрики (не кэшируется, как и основные)."""
+    return {
+        "range_temp": calculate_range_temp(df),
+        "extreme_temp_diff": calculate_extreme_temp_diff(df),
+        "wind_direction_mode": calculate_wind_direction_mode(df),
+        "max_wind_gust": calculate_max_wind_gust(df),
+        "avg_precip": calculate_avg_precip(df),
+        "rain_days": calculate_rain_days(df),
+        "snow_days": calculate_snow_days(df),
+        "temp_precip_corr": calculate_temp_precip_corr(df),
+    }
+
+
+@traced("metrics.calculate_seasonal_statistics", cached=True)
 @st.cache_data
 def calculate_seasonal_statistics(df: pd.DataFrame, metrics: list[str]) -> pd.DataFrame:
+    """Кэшируемая сезонная статистика для дашборда."""
+    mark_cache_miss()
+    return compute_seasonal_statistics(df, metrics)
+
+
+def compute_seasonal_statistics(df: pd.DataFrame, metrics: list[str]) -> pd.DataFrame:
     """Рассчитывает средни показатели по сезонам."""
     logger.info("Начало расчёта сезонной статистики")
 
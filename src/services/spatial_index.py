@@ -0,0 +1,186 @@
+import heapq
+import numpy as np
+import pandas as pd
+import streamlit as st
+from repository import get_cities
+from utils.tracing import traced
+import logging
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def to_unit_vectors(lat, lon) -> np.ndarray:
+    """Переводит широту и долготу (градусы) в точки на единичной сфере."""
+    lat, lon = np.deg2rad(np.asarray(lat, dtype=float)), np.deg2rad(np.asarray(lon, dtype=float))
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+
+def km_to_chord(distance_km: float) -> float:
+    """Переводит расстояние по поверхности Земли в длину хорды единичной сферы."""
+    return 2 * np.sin(min(distance_km / EARTH_RADIUS_KM, np.pi) / 2)
+
+
+class CityIndex:
+    """Пространственный индекс городов.
+
+    KD-дерево по точкам на единичной сфере обслуживает поиск ближайших городов и городов
+    в радиусе (евклидово расстояние хорды монотонно расстоянию по дуге, поэтому переход
+    через 180-й меридиан не требует особой обработки). Массив, отсортированный по широте,
+    обслуживает запросы по прямоугольной области карты.
+    """
+
+    def __init__(self, cities_df: pd.DataFrame, leaf_size: int = 16):
+        cities_df = cities_df.dropna(subset=["latitude", "longitude"]).drop_duplicates("city_name")
+        self.names = cities_df["city_name"].to_numpy()
+        self.lat = cities_df["latitude"].to_numpy(dtype=float)
+        self.lon = cities_df["longitude"].to_numpy(dtype=float)
+        self.points = to_unit_vectors(self.lat, self.lon)
+        self._positions = {name: i for i, name in enumerate(self.names)}
+        self._lat_order = np.argsort(self.lat, kind="stable")
+        self._sorted_lat = self.lat[self._lat_order]
+        self._build(leaf_size)
+        logger.info(f"Построен пространственный индекс: {len(self.names)} городов, "
+                    f"{len(self._start)} узлов")
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def locate(self, city_name: str) -> int:
+        """Возвращает индекс города по названию."""
+        return self._positions[city_name]
+
+    def _build(self, leaf_size: int) -> None:
+        """Строит KD-дерево в виде плоских массивов узлов."""
+        self._order = np.arange(len(self.points))
+        start, end, left, right, lo, hi = [], [], [], [], [], []
+
+        def add_node(node_start: int, node_end: int) -> int:
+            node_points = self.points[self._order[node_start:node_end]]
+            start.append(node_start)
+            end.append(node_end)
+            left.append(-1)
+            right.append(-1)
+            lo.append(node_points.min(axis=0) if len(node_points) else np.zeros(3))
+            hi.append(node_points.max(axis=0) if len(node_points) else np.zeros(3))
+            return len(start) - 1
+
+        stack = [add_node(0, len(self.points))]
+        while stack:
+            node = stack.pop()
+            node_start, node_end = start[node], end[node]
+            if node_end - node_start <= leaf_size:
+                continue
+            dim = int(np.argmax(hi[node] - lo[node]))
+            mid = (node_start + node_end) // 2
+            segment = self._order[node_start:node_end]
+            partition = np.argpartition(self.points[segment, dim], mid - node_start)
+            self._order[node_start:node_end] = segment[partition]
+            left[node] = add_node(node_start, mid)
+            right[node] = add_node(mid, node_end)
+            stack.extend([left[node], right[node]])
+
+        self._start, self._end = np.array(start), np.array(end)
+        self._left, self._right = np.array(left), np.array(right)
+        self._lo, self._hi = np.array(lo), np.array(hi)
+
+    def _box_distance(self, node: int, point: np.ndarray) -> float:
+        gap = np.maximum(np.maximum(self._lo[node] - point, point - self._hi[node]), 0)
+        return float(np.sqrt(gap @ gap))
+
+    def within_radius(self, lat: float, lon: float, radius_km: float) -> np.ndarray:
+        """Возвращает индексы городов не дальше `radius_km` от точки."""
+        point = to_unit_vectors([lat], [lon])[0]
+        chord = km_to_chord(radius_km)
+        found = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if self._box_distance(node, point) > chord:
+                continue
+            if self._left[node] == -1:
+                candidates = self._order[self._start[node]:self._end[node]]
+                distances = np.linalg.norm(self.points[candidates] - point, axis=1)
+                found.append(candidates[distances <= chord])
+            else:
+                stack.extend([self._left[node], self._right[node]])
+        return np.sort(np.concatenate(found)) if found else np.array([], dtype=int)
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> np.ndarray:
+        """Возвращает индексы `k` ближайших городов в порядке удаления."""
+        point = to_unit_vectors([lat], [lon])[0]
+        best: list[tuple[float, int]] = []  # Куча с обратным знаком: наихудший кандидат сверху
+        heap = [(0.0, 0)]
+        while heap:
+            box_distance, node = heapq.heappop(heap)
+            if len(best) == k and box_distance > -best[0][0]:
+                break
+            if self._left[node] == -1:
+                candidates = self._order[self._start[node]:self._end[node]]
+                distances = np.linalg.norm(self.points[candidates] - point, axis=1)
+                for distance, candidate in zip(distances, candidates):
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, int(candidate)))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, int(candidate)))
+            else:
+                for child in (self._left[node], self._right[node]):
+                    heapq.heappush(heap, (self._box_distance(child, point), int(child)))
+        return np.array([candidate for _, candidate in sorted(best, reverse=True)], dtype=int)
+
+    def in_bbox(self, lat_min: float, lat_max: float, lon_min: float, lon_max: float) -> np.ndarray:
+        """Возвращает индексы городов в прямоугольной области.
+
+        Если `lon_min > lon_max`, область пересекает 180-й меридиан.
+        """
+        lo = np.searchsorted(self._sorted_lat, lat_min, side="left")
+        hi = np.searchsorted(self._sorted_lat, lat_max, side="right")
+        candidates = self._lat_order[lo:hi]
+        lon = self.lon[candidates]
+        if lon_min <= lon_max:
+            mask = (lon >= lon_min) & (lon <= lon_max)
+        else:
+            mask = (lon >= lon_min) | (lon <= lon_max)
+        return np.sort(candidates[mask])
+
+    def distances_km(self, indices: np.ndarray, lat: float, lon: float) -> np.ndarray:
+        """Возвращает расстояния по дуге (км) от точки до указанных городов."""
+        point = to_unit_vectors([lat], [lon])[0]
+        cos_angle = np.clip(self.points[indices] @ point, -1.0, 1.0)
+        return np.arccos(cos_angle) * EARTH_RADIUS_KM
+
+    def frame(self, indices: np.ndarray) -> pd.DataFrame:
+        """Возвращает города по индексам в виде таблицы с координатами для карты."""
+        return pd.DataFrame({
+            "city_name": self.names[indices],
+            "lat": self.lat[indices],
+            "lng": self.lon[indices],
+        })
+
+
+def cluster_points(map_df: pd.DataFrame, value_col: str, cell_deg: float) -> pd.DataFrame:
+    """Объединяет точки карты в ячейки сетки `cell_deg` градусов (уровень детализации)."""
+    if map_df.empty or cell_deg <= 0:
+        return map_df.assign(count=1)
+    lat_cells = np.floor(map_df["lat"].to_numpy() / cell_deg).astype(int)
+    lng_cells = np.floor(map_df["lng"].to_numpy() / cell_deg).astype(int)
+    clustered = map_df.groupby([lat_cells, lng_cells], sort=False).agg(
+        city_name=("city_name", "first"),
+        lat=("lat", "mean"),
+        lng=("lng", "mean"),
+        value=(value_col, "mean"),
+        count=("city_name", "size"),
+    ).rename(columns={"value": value_col})
+    many = clustered["count"] > 1
+    clustered.loc[many, "city_name"] = (clustered.loc[many, "city_name"] + " и ещё "
+                                        + (clustered.loc[many, "count"] - 1).astype(str))
+    return clustered.reset_index(drop=True)
+
+
+@traced("spatial.get_city_index")
+@st.cache_resource
+def get_city_index() -> CityIndex:
+    """Возвращает общий для всех сессий пространственный индекс всех городов."""
+    return CityIndex(get_cities())
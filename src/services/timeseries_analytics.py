@@ -0,0 +1,120 @@
+import pandas as pd
+import streamlit as st
+from sqlalchemy import bindparam, inspect, text
+from repository import engine
+from utils.column_names import NORMALS_METRICS
+from utils.tracing import traced, mark_cache_miss
+import logging
+
+logger = logging.getLogger(__name__)
+
+ROLLING_WINDOWS = (7, 30)
+FREQUENCIES = {"day": "%Y-%m-%d", "month": "%Y-%m"}
+
+# Нормы берутся из таблицы climate_normals (data_loaders.load_climate_normals), а если её
+# ещё нет — считаются на лету по всей истории выбранных городов
+_NORMALS_TABLE_SQL = "SELECT city_name, month_day, {metric} AS normal FROM climate_normals"
+_NORMALS_INLINE_SQL = """
+    SELECT city_name, strftime('%m-%d', date) AS month_day, AVG({metric}) AS normal
+    FROM weather
+    WHERE city_name IN :cities
+    GROUP BY city_name, month_day
+"""
+
+_TIMESERIES_SQL = """
+WITH series AS (
+    SELECT city_name, date, {metric} AS value, julianday(date) AS day
+    FROM weather
+    WHERE city_name IN :cities AND date BETWEEN :lookback_start AND :end_date
+),
+windows AS (
+    SELECT city_name, date, value,
+           AVG(value) OVER (PARTITION BY city_name ORDER BY day
+                            RANGE BETWEEN 6 PRECEDING AND CURRENT ROW) AS rolling_7,
+           AVG(value) OVER (PARTITION BY city_name ORDER BY day
+                            RANGE BETWEEN 29 PRECEDING AND CURRENT ROW) AS rolling_30
+    FROM series
+),
+normals AS ({normals_sql}),
+daily AS (
+    SELECT w.city_name, w.date, w.value, w.rolling_7, w.rolling_30, n.normal,
+           w.value - n.normal AS anomaly,
+           -- У 29 февраля нет того же дня в прошлом году
+           w.value - (SELECT p.{metric} FROM weather p
+                      WHERE p.date = date(w.date, '-1 year') AND p.city_name = w.city_name
+                        AND strftime('%m-%d', w.date) != '02-29'
+                      LIMIT 1) AS yoy_delta
+    FROM windows w
+    LEFT JOIN normals n ON n.city_name = w.city_name AND n.month_day = strftime('%m-%d', w.date)
+    WHERE w.date >= :start_date
+)
+SELECT city_name, strftime('{period_format}', date) AS period,
+       AVG(value) AS value, AVG(rolling_7) AS rolling_7, AVG(rolling_30) AS rolling_30,
+       AVG(normal) AS normal, AVG(anomaly) AS anomaly, AVG(yoy_delta) AS yoy_delta
+FROM daily
+GROUP BY city_name, period
+ORDER BY city_name, period
+"""
+
+
+def has_climate_normals() -> bool:
+    """Проверяет, построена ли таблица климатических норм."""
+    return inspect(engine).has_table("climate_normals")
+
+
+def query_timeseries_analytics(
+    metric: str,
+    cities: list[str],
+    start_date,
+    end_date,
+    frequency: str = "day",
+) -> pd.DataFrame:
+    """Считает в базе скользящие средние, отклонения от нормы и изменения к прошлому году.
+
+    Возвращает по строке на город и период (день или месяц) со столбцами
+    value, rolling_7, rolling_30, normal, anomaly, yoy_delta.
+    """
+    if metric not in NORMALS_METRICS:
+        raise ValueError(f"Метрика {metric} не поддерживается для временных рядов")
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"Неизвестная частота: {frequency}")
+    if not cities:
+        return pd.DataFrame()
+
+    start = pd.to_datetime(start_date)
+    normals_sql = (_NORMALS_TABLE_SQL if has_climate_normals() else _NORMALS_INLINE_SQL)
+    stmt = text(_TIMESERIES_SQL.format(
+        metric=metric,
+        normals_sql=normals_sql.format(metric=metric),
+        period_format=FREQUENCIES[frequency],
+    )).bindparams(bindparam("cities", expanding=True))
+    params = {
+        "cities": list(cities),
+        # Запас в начале периода, чтобы 30-дневное окно было полным с первой даты
+        "lookback_start": (
+            start - pd.Timedelta(days=max(ROLLING_WINDOWS) - 1)
+        ).strftime('%Y-%m-%d'),
+        "start_date": start.strftime('%Y-%m-%d'),
+        "end_date": pd.to_datetime(end_date).strftime('%Y-%m-%d'),
+    }
+    logger.info(f"Запрос временного ряда: metric={metric}, cities={len(cities)}, "
+                f"frequency={frequency}, start_date={start_date}, end_date={end_date}")
+    with engine.connect() as conn:
+        df = pd.read_sql(stmt, conn, params=params)
+    df["period"] = pd.to_datetime(df["period"])
+    logger.info(f"Временной ряд рассчитан: {len(df)} строк")
+    return df
+
+
+@traced("timeseries.get_timeseries_analytics", cached=True)
+@st.cache_data
+def get_timeseries_analytics(
+    metric: str,
+    cities: list[str],
+    start_date,
+    end_date,
+    frequency: str = "day",
+) -> pd.DataFrame:
+    """Кэшируемая обёртка над `query_timeseries_analytics` для дашборда."""
+    mark_cache_miss()
+    return query_timeseries_analytics(metric, cities, start_date, end_date, frequency)
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+from utils.tracing import traced
+import logging
+
+logger = logging.getLogger(__name__)
+
+WIND_SECTORS = 16
+SECTOR_LABELS = ["С", "ССВ", "СВ", "ВСВ", "В", "ВЮВ", "ЮВ", "ЮЮВ",
+                 "Ю", "ЮЮЗ", "ЮЗ", "ЗЮЗ", "З", "ЗСЗ", "СЗ", "ССЗ"]
+# Классы скорости ветра (км/ч) для розы ветров
+SPEED_BINS = [0, 5, 10, 20, 30, np.inf]
+SPEED_LABELS = ["0–5", "5–10", "10–20", "20–30", "30+"]
+
+
+def sector_indices(degrees: np.ndarray, sectors: int = WIND_SECTORS) -> np.ndarray:
+    """Возвращает номера секторов (0 — север, по часовой стрелке) для направлений в градусах.
+
+    Сектор центрирован на своём азимуте, поэтому 359° и 1° попадают в один северный сектор.
+    """
+    degrees = np.asarray(degrees, dtype=float)
+    if degrees.size and degrees.min() < 0:
+        degrees = np.mod(degrees, 360)
+    width = 360 / sectors
+    # Для неотрицательных значений приведение к целому совпадает с floor, но дешевле
+    indices = ((degrees + width / 2) * (1 / width)).astype(np.intp)
+    indices %= sectors
+    return indices
+
+
+def sector_sql(column: str = "avg_wind_dir_deg", sectors: int = WIND_SECTORS) -> str:
+    """Возвращает SQL-выражение номера сектора, совпадающее с `sector_indices` (для 0–360°)."""
+    width = 360 / sectors
+    return f"(CAST(({column} + {width / 2}) / {width} AS INTEGER) % {sectors})"
+
+
+def sector_counts(degrees, sectors: int = WIND_SECTORS) -> np.ndarray:
+    """Считает количество наблюдений в каждом секторе."""
+    degrees = np.asarray(degrees, dtype=float)
+    degrees = degrees[~np.isnan(degrees)]
+    return np.bincount(sector_indices(degrees, sectors), minlength=sectors)
+
+
+def circular_mean(degrees, weights=None) -> tuple[float, float]:
+    """Возвращает круговое среднее направление (градусы) и длину результирующего вектора (0–1)."""
+    degrees = np.asarray(degrees, dtype=float)
+    weights = np.ones_like(degrees) if weights is None else np.asarray(weights, dtype=float)
+    valid = ~np.isnan(degrees) & ~np.isnan(weights)
+    total = weights[valid].sum()
+    if total == 0:
+        return float("nan"), float("nan")
+    radians = np.deg2rad(degrees[valid])
+    cos_sum = np.dot(weights[valid], np.cos(radians))
+    sin_sum = np.dot(weights[valid], np.sin(radians))
+    mean_deg = round(float(np.rad2deg(np.arctan2(sin_sum, cos_sum))), 6) % 360
+    return mean_deg, float(np.hypot(cos_sum, sin_sum) / total)
+
+
+def wind_rose_from_counts(counts: np.ndarray) -> pd.DataFrame:
+    """Собирает таблицу розы ветров из матрицы «сектор × класс скорости»."""
+    sectors = counts.shape[0]
+    labels = np.asarray(SECTOR_LABELS if sectors == WIND_SECTORS
+                        else [f"{i * 360 / sectors:g}°" for i in range(sectors)])
+    sector_index, speed_index = np.indices(counts.shape)
+    total = counts.sum()
+    return pd.DataFrame({
+        "sector": sector_index.ravel(),
+        "direction": labels[sector_index.ravel()],
+        "speed_class": np.asarray(SPEED_LABELS)[speed_index.ravel()],
+        "count": counts.ravel(),
+        "frequency": counts.ravel() / total * 100 if total else 0.0,
+    })
+
+
+@traced("wind.calculate_wind_rose")
+def calculate_wind_rose(df: pd.DataFrame) -> pd.DataFrame:
+    """Рассчитывает розу ветров: частоту по 16 секторам и классам скорости за один bincount."""
+    degrees = df["avg_wind_dir_deg"].to_numpy(dtype=float)
+    speeds = df["avg_wind_speed_kmh"].to_numpy(dtype=float)
+    valid = ~np.isnan(degrees)
+    # Скорость без данных относим к первому классу, чтобы не терять направление
+    speed_class = np.searchsorted(SPEED_BINS[1:-1], np.nan_to_num(speeds[valid]), side="right")
+    flat_index = sector_indices(degrees[valid]) * len(SPEED_LABELS) + speed_class
+    counts = np.bincount(flat_index, minlength=WIND_SECTORS * len(SPEED_LABELS))
+    return wind_rose_from_counts(counts.reshape(WIND_SECTORS, len(SPEED_LABELS)))
+
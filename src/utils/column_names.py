@@ -44,6 +44,61 @@ MAIN_METRICS = [
     # "sunshine_total_min"   # Не включаем, т.к. очень много пропусков
 ]
 
+# Метрики, для которых считаются климатические нормы и временные ряды
+# (направление ветра — круговая величина, его нельзя усреднять арифметически)
+NORMALS_METRICS = [metric for metric in MAIN_METRICS if metric != "avg_wind_dir_deg"]
+
+TIMESERIES_NAMES = {
+    "value": "Значение",
+    "rolling_7": "Скользящее среднее (7 дней)",
+    "rolling_30": "Скользящее среднее (30 дней)",
+    "normal": "Климатическая норма",
+    "anomaly": "Отклонение от нормы",
+    "yoy_delta": "Изменение к прошлому году",
+}
+
+COMPARISON_GROUP_NAMES = {
+    "city_name": "Город",
+    "country": "Страна",
+}
+
+COMPARISON_NAMES = {
+    "observations": "Наблюдений",
+    "avg_temp": "Средняя температура (°C)",
+    "median_temp": "Медиана температуры (°C)",
+    "precip_days": "Доля дней с осадками (%)",
+    "avg_wind_speed": "Средняя скорость ветра (км/ч)",
+    "min_temp": "Минимум средней температуры (°C)",
+    "max_temp": "Максимум средней температуры (°C)",
+    "extreme_temp_diff": "Разница экстремальных температур (°C)",
+    "wind_direction_mode": "Преобладающее направление ветра",
+    "max_wind_gust": "Максимальный порыв ветра (км/ч)",
+    "avg_precip": "Средний уровень осадков (мм)",
+    "rain_days": "Дни с дождём",
+    "snow_days": "Дни со снегом",
+    "temp_precip_corr": "Корреляция температуры и осадков",
+}
+
+# Статистики профиля данных (data_profiling.py); квантили — приближённые
+PROFILE_NAMES = {
+    "dtype": "Тип",
+    "missing": "Пропуски",
+    "missing_percent": "Пропуски (%)",
+    "unique": "Уникальных значений",
+    "count": "Количество",
+    "mean": "Среднее",
+    "std": "Стандартное отклонение",
+    "min": "Минимум",
+    "0.01": "1-й процентиль",
+    "0.25": "Нижний квартиль",
+    "0.5": "Медиана",
+    "0.75": "Верхний квартиль",
+    "0.99": "99-й процентиль",
+    "max": "Максимум",
+    "skewness": "Асимметрия",
+    "kurtosis": "Эксцесс",
+}
+
 
 def rename_column(col, translation_dict: dict):
     """Рекурсивно переименовывает столбец, сохраняя его структуру."""
@@ -1,3 +1,5 @@
+from pathlib import Path
+
 import pandas as pd
 
 
@@ -7,5 +9,26 @@ DEFAULT_START = pd.to_datetime("2019-01-01").date()
 DEFAULT_END = pd.to_datetime("2022-12-31").date()
 DAFAULT_TIMELINE_START = pd.to_datetime("2000-01-01").date()
 
+PARQUET_PATH = Path("./data/daily_weather.parquet")
+PROFILE_PATH = Path("./data/profile.json")  # Профиль данных, который строит data_profiling.py
+
 LIMIT_WEATHER_RECORDS = 30_000
 CHUNK_SIZE = 100_000
+LIMIT_TIMESERIES_CITIES = 20
+FIGURE_CACHE_SIZE = 32
+LIMIT_COMPARISON_CHART = 20  # Сколько лидеров сравнения показывать на графике
+
+# Области карты: широта от/до, долгота от/до (если долгота «от» больше «до» — через 180-й меридиан)
+MAP_REGIONS = {
+    "Весь мир": (-90.0, 90.0, -180.0, 180.0),
+    "Европа": (34.0, 72.0, -25.0, 45.0),
+    "Азия": (-11.0, 78.0, 25.0, 180.0),
+    "Россия и СНГ": (35.0, 78.0, 20.0, 180.0),
+    "Северная Америка": (7.0, 75.0, -170.0, -50.0),
+    "Южная Америка": (-56.0, 13.0, -82.0, -34.0),
+    "Африка": (-35.0, 38.0, -18.0, 52.0),
+    "Океания": (-48.0, 0.0, 110.0, -175.0),
+}
+MAP_MAX_POINTS = 400  # Больше точек в области — объединяем их в кластеры
+DEFAULT_RADIUS_KM = 300
+DEFAULT_NEAREST_CITIES = 10
@@ -1,7 +1,10 @@
 import logging
+import os
 
+TRACE_LOGGER_NAME = "utils.tracing"
 
-def setup_logging():
+
+def setup_logging(trace_log_file: str | None = None):
     logging.basicConfig(
         level=logging.INFO,
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
@@ -9,3 +12,19 @@ def setup_logging():
             logging.StreamHandler(),
         ]
     )
+    trace_log_file = trace_log_file or os.getenv("TRACE_LOG_FILE")
+    if trace_log_file:
+        setup_trace_logging(trace_log_file)
+
+
+def setup_trace_logging(path: str):
+    """Направляет структурированные записи трассировки (JSON-строки) в отдельный файл."""
+    trace_logger = logging.getLogger(TRACE_LOGGER_NAME)
+    path = os.path.abspath(path)
+    if any(getattr(handler, "baseFilename", None) == path for handler in trace_logger.handlers):
+        return  # Streamlit вызывает настройку на каждом перезапуске скрипта
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    trace_logger.addHandler(handler)
+    trace_logger.setLevel(logging.DEBUG)
+    trace_logger.propagate = False
@@ -0,0 +1,205 @@
+import bisect
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from streamlit.runtime.caching import get_data_cache_stats_provider
+
+from utils import tracing
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROWS_BUCKETS = (1, 10, 100, 1_000, 10_000, 30_000, 100_000, 1_000_000)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин в формате Prometheus."""
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Последняя корзина — +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Оценивает квантиль линейной интерполяцией внутри корзины (как histogram_quantile)."""
+        if self.count == 0:
+            return float("nan")
+        rank = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count > 0:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+
+_lock = threading.Lock()
+# Длительности по операции и результату обращения к кэшу ("hit", "miss" или "none")
+_durations: dict[tuple[str, str], Histogram] = {}
+_rows: dict[tuple[str], Histogram] = {}
+_cache_requests: dict[tuple[str, str], int] = {}
+_server: ThreadingHTTPServer | None = None
+
+
+def observe_trace(record: dict) -> None:
+    """Агрегирует запись трассировки в метрики (регистрируется как получатель `tracing`)."""
+    operation = record["stage"]
+    cache = record.get("cache") or "none"
+    with _lock:
+        _durations.setdefault((operation, cache), Histogram(DURATION_BUCKETS)).observe(
+            record["duration_ms"] / 1000
+        )
+        if record.get("rows_out") is not None:
+            _rows.setdefault((operation,), Histogram(ROWS_BUCKETS)).observe(record["rows_out"])
+        if record.get("cache") is not None:
+            key = (operation, record["cache"])
+            _cache_requests[key] = _cache_requests.get(key, 0) + 1
+
+
+def cache_memory_bytes() -> dict[str, int]:
+    """Возвращает текущий объём записей `st.cache_data` в памяти по кэшируемым функциям.
+
+    Streamlit хранит записи в сериализованном виде, поэтому это их фактический размер;
+    очищенные и вытесненные записи в него не входят.
+    """
+    return {stat.cache_name: stat.byte_length
+            for stat in get_data_cache_stats_provider().get_stats()}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_histogram(name: str, histograms: dict[tuple, Histogram],
+                      label_names: tuple[str, ...]) -> list[str]:
+    lines = []
+    for key, hist in sorted(histograms.items()):
+        label = ",".join(f'{label_name}="{_escape(value)}"'
+                         for label_name, value in zip(label_names, key))
+        cumulative = 0
+        for bound, bucket_count in zip(hist.buckets, hist.counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{{label},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{label},le="+Inf"}} {hist.count}')
+        lines.append(f"{name}_sum{{{label}}} {hist.sum}")
+        lines.append(f"{name}_count{{{label}}} {hist.count}")
+    return lines
+
+
+def render_prometheus() -> str:
+    """Возвращает все метрики в текстовом формате Prometheus."""
+    memory = cache_memory_bytes()
+    with _lock:
+        lines = [
+            "# HELP weather_app_operation_duration_seconds Длительность операций "
+            "по результату обращения к кэшу (hit, miss; none — операция без кэша).",
+            "# TYPE weather_app_operation_duration_seconds histogram",
+            *_format_histogram("weather_app_operation_duration_seconds", _durations,
+                              ("operation", "cache")),
+            "# HELP weather_app_operation_rows Количество строк в результате операций.",
+            "# TYPE weather_app_operation_rows histogram",
+            *_format_histogram("weather_app_operation_rows", _rows, ("operation",)),
+            "# HELP weather_app_cache_requests_total Обращения к кэшу по результату.",
+            "# TYPE weather_app_cache_requests_total counter",
+            *(f'weather_app_cache_requests_total{{operation="{_escape(op)}",result="{result}"}} '
+              f'{value}' for (op, result), value in sorted(_cache_requests.items())),
+        ]
+    lines += [
+        "# HELP weather_app_cache_memory_bytes Текущий объём записей st.cache_data в памяти.",
+        "# TYPE weather_app_cache_memory_bytes gauge",
+        *(f'weather_app_cache_memory_bytes{{function="{_escape(function)}"}} {value}'
+          for function, value in sorted(memory.items())),
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def summarize() -> list[dict]:
+    """Возвращает сводку по операциям и результату обращения к кэшу.
+
+    Для каждой пары — число вызовов и p50/p99; доля попаданий в кэш — по операции в целом.
+    """
+    with _lock:
+        summary = []
+        for (operation, cache), hist in sorted(_durations.items()):
+            hits = _cache_requests.get((operation, "hit"), 0)
+            misses = _cache_requests.get((operation, "miss"), 0)
+            summary.append({
+                "operation": operation,
+                "cache": cache,
+                "count": hist.count,
+                "p50_ms": hist.quantile(0.5) * 1000,
+                "p99_ms": hist.quantile(0.99) * 1000,
+                "cache_hit_ratio": hits / (hits + misses) if hits + misses else None,
+            })
+    return summary
+
+
+def dump_to_file(path: str) -> None:
+    """Атомарно записывает метрики в файл (для node_exporter textfile collector)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def start_http_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Запускает HTTP-эндпоинт /metrics в фоновом потоке (один раз на процесс)."""
+    global _server
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, daemon=True,
+                             name="metrics-http").start()
+            logger.info(f"Эндпоинт метрик запущен на "
+                        f"http://{host}:{_server.server_address[1]}/metrics")
+    return _server
+
+
+def setup_telemetry() -> None:
+    """Подключает сбор метрик и, если задан `METRICS_PORT`, запускает HTTP-эндпоинт."""
+    tracing.add_sink(observe_trace)
+    port = os.getenv("METRICS_PORT")
+    if port:
+        try:
+            start_http_server(int(port))
+        except OSError as e:
+            logger.error(f"Не удалось запустить эндпоинт метрик на порту {port}: {e}")
+
+
+def dump_if_configured() -> None:
+    """Сохраняет метрики в файл из `METRICS_FILE`, если он задан."""
+    path = os.getenv("METRICS_FILE")
+    if path:
+        try:
+            dump_to_file(path)
+        except OSError as e:
+            logger.error(f"Не удалось сохранить метрики в {path}: {e}")
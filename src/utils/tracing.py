@@ -0,0 +1,110 @@
+import functools
+import json
+import logging
+import time
+from contextvars import ContextVar
+from typing import Callable
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Записи текущего прогона скрипта и стек активных этапов (для вложенности и отметки промахов кэша)
+_run_records: ContextVar[list[dict] | None] = ContextVar("trace_run_records", default=None)
+_active_stack: ContextVar[tuple[dict, ...]] = ContextVar("trace_active_stack", default=())
+
+# Получатели завершённых записей (например, агрегаторы метрик)
+_sinks: list[Callable[[dict], None]] = []
+
+
+def start_run() -> None:
+    """Начинает сбор записей для нового прогона приложения."""
+    _run_records.set([])
+    _active_stack.set(())
+
+
+def get_run_records() -> list[dict]:
+    """Возвращает записи текущего прогона."""
+    return list(_run_records.get() or [])
+
+
+def add_sink(sink: Callable[[dict], None]) -> None:
+    """Регистрирует получателя завершённых записей."""
+    if sink not in _sinks:
+        _sinks.append(sink)
+
+
+def mark_cache_miss() -> None:
+    """Отмечает, что текущий кэшируемый этап выполнил реальные вычисления."""
+    stack = _active_stack.get()
+    if stack:
+        stack[-1]["cache"] = "miss"
+
+
+def describe_size(obj) -> tuple[int | None, int | None]:
+    """Возвращает количество строк и объём в байтах для результата этапа."""
+    if isinstance(obj, pd.DataFrame):
+        return len(obj), int(obj.memory_usage(index=True).sum())
+    if isinstance(obj, pd.Series):
+        return len(obj), int(obj.memory_usage(index=True))
+    if isinstance(obj, (bytes, bytearray)):
+        return None, len(obj)
+    return None, None
+
+
+def _first_dataframe(args, kwargs) -> pd.DataFrame | None:
+    for value in (*args, *kwargs.values()):
+        if isinstance(value, pd.DataFrame):
+            return value
+    return None
+
+
+def _begin(record: dict) -> None:
+    # Место в прогоне занимается при старте этапа, чтобы родитель шёл перед вложенными этапами
+    records = _run_records.get()
+    if records is not None:
+        records.append(record)
+
+
+def _finish(record: dict) -> None:
+    logger.debug(json.dumps(record, ensure_ascii=False), extra={"trace": record})
+    for sink in _sinks:
+        try:
+            sink(record)
+        except Exception as e:
+            logger.error(f"Ошибка в получателе трассировки: {e}")
+
+
+def traced(stage: str, cached: bool = False):
+    """Декоратор, замеряющий время, строки и байты этапа.
+
+    Для кэшируемых функций (`cached=True`) декоратор ставится над `@st.cache_data`,
+    а тело функции вызывает `mark_cache_miss()`, чтобы отличать попадания от промахов.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            source = _first_dataframe(args, kwargs)
+            record = {
+                "stage": stage,
+                "depth": len(_active_stack.get()),
+                "rows_in": len(source) if source is not None else None,
+                "cache": "hit" if cached else None,
+            }
+            _begin(record)
+            token = _active_stack.set((*_active_stack.get(), record))
+            start = time.perf_counter()
+            status = "error"
+            try:
+                result = func(*args, **kwargs)
+                status = "ok"
+            finally:
+                record["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+                record["status"] = status
+                _active_stack.reset(token)
+                if status == "ok":
+                    record["rows_out"], record["bytes"] = describe_size(result)
+                _finish(record)
+            return result
+        return wrapper
+    return decorator
@@ -1,17 +1,32 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import logging
-from utils.column_names import COLUMN_NAMES, MAIN_METRICS
-from repository import get_cities, get_weather_for_map, to_excel
+from utils.column_names import COLUMN_NAMES, MAIN_METRICS, NORMALS_METRICS, TIMESERIES_NAMES
+from repository import get_weather_for_map, resolve_cities
 from services import metrics_calculator as metrics
-from utils.constants import MIN_DATE, MAX_DATE
+from services import wind_statistics
+from services.spatial_index import cluster_points, get_city_index
+from services.timeseries_analytics import get_timeseries_analytics
+from utils.constants import (MIN_DATE, MAX_DATE, LIMIT_TIMESERIES_CITIES, MAP_REGIONS,
+                             MAP_MAX_POINTS)
+from utils.figure_cache import cached_figure
+from utils.tracing import traced
+from views.components import excel_download_button, traced_fragment
 
 logger = logging.getLogger(__name__)
 
 
-def create_map(map_df: pd.DataFrame, value_col: str = "avg_temp_c") -> px.scatter_geo:
-    """Создаёт карту с городами."""
+@traced("additional_dashboard.create_map", cached=True)
+@cached_figure(columns=("city_name", "lat", "lng", "count"))
+def create_map(
+    map_df: pd.DataFrame,
+    value_col: str = "avg_temp_c",
+    lat_range: tuple[float, float] | None = None,
+    lon_range: tuple[float, float] | None = None,
+) -> px.scatter_geo:
+    """Создаёт карту с городами (или кластерами городов, если есть столбец count)."""
     logger.info(f"Создание карты для метрики: {value_col}")
 
     map_df = map_df.copy()
@@ -19,33 +34,156 @@ def create_map(map_df: pd.DataFrame, value_col: str = "avg_temp_c") -> px.scatte
     fig = px.scatter_geo(
         map_df, lat="lat", lon="lng", hover_name="city_name",
         color=map_df[value_col],
+        size="count" if "count" in map_df.columns else None,
         projection="natural earth",
         title=f"Карта: {COLUMN_NAMES.get(value_col, value_col)}"
     )
+    if lat_range and lon_range:
+        fig.update_geos(lataxis_range=list(lat_range), lonaxis_range=list(lon_range))
     return fig
 
 
+@traced("additional_dashboard.create_timeseries_plot", cached=True)
+@cached_figure(columns=("period", "city_name"))
+def create_timeseries_plot(ts_df: pd.DataFrame, y: str = "rolling_30",
+                           metric: str = "avg_temp_c") -> px.line:
+    """Создаёт график временного ряда по городам."""
+    fig = px.line(
+        ts_df,
+        x="period",
+        y=y,
+        color="city_name",
+        labels={
+            "period": COLUMN_NAMES["date"],
+            y: TIMESERIES_NAMES.get(y, y),
+            "city_name": COLUMN_NAMES["city_name"],
+        },
+        title=f"{COLUMN_NAMES.get(metric, metric)}: {TIMESERIES_NAMES.get(y, y)}",
+    )
+    if y in ("anomaly", "yoy_delta"):
+        fig.add_hline(y=0, line_dash="dot", line_color="gray")
+    return fig
+
+
+@traced("additional_dashboard.create_wind_rose", cached=True)
+@cached_figure(columns=("direction", "speed_class", "frequency"))
+def create_wind_rose(rose_df: pd.DataFrame) -> px.bar_polar:
+    """Создаёт розу ветров."""
+    return px.bar_polar(
+        rose_df,
+        r="frequency",
+        theta="direction",
+        color="speed_class",
+        category_orders={
+            "direction": wind_statistics.SECTOR_LABELS,
+            "speed_class": wind_statistics.SPEED_LABELS,
+        },
+        labels={
+            "frequency": "Повторяемость (%)",
+            "direction": "Направление",
+            "speed_class": COLUMN_NAMES["avg_wind_speed_kmh"],
+        },
+        title="Роза ветров",
+    )
+
+
+@traced_fragment("additional_dashboard.display_additional_metrics")
 def display_additional_metrics(df: pd.DataFrame):
     """Отображает дополнительные метрики."""
     logger.info("Отображение дополнительных метрик")
     st.subheader("Дополнительные метрики")
 
+    kpis = metrics.calculate_additional_metrics(df)
     col1, col2 = st.columns(2)
     with col1:
         st.metric("Диапазон средней температуры",
-                  '…'.join([f'{temp:+.2f}' for temp in metrics.calculate_range_temp(df)]) + " °C")
-        st.metric("Разница экстремальных температур",
-                  f"{metrics.calculate_extreme_temp_diff(df):.2f} °C")
-        st.metric("Преобладающее направление ветра", metrics.calculate_wind_direction_mode(df))
-        st.metric("Максимальный порыв ветра", f"{metrics.calculate_max_wind_gust(df):.2f} км/ч")
+                  '…'.join([f'{temp:+.2f}' for temp in kpis["range_temp"]]) + " °C")
+        st.metric("Разница экстремальных температур", f"{kpis['extreme_temp_diff']:.2f} °C")
+        st.metric("Преобладающее направление ветра", kpis["wind_direction_mode"])
+        st.metric("Максимальный порыв ветра", f"{kpis['max_wind_gust']:.2f} км/ч")
+    with col2:
+        st.metric("Средний уровень осадков", f"{kpis['avg_precip']:.2f} мм")
+        st.metric("Дни с дождём", kpis["rain_days"])
+        st.metric("Дни со снегом", kpis["snow_days"])
+        st.metric("Корреляция температуры и осадков", f"{kpis['temp_precip_corr']:.2f}")
+
+
+@traced_fragment("additional_dashboard.display_wind_rose")
+def display_wind_rose(df: pd.DataFrame):
+    """Отображает розу ветров и среднее направление ветра."""
+    logger.info("Отображение розы ветров")
+    st.subheader("Роза ветров")
+
+    if df["avg_wind_dir_deg"].isna().all():
+        st.info("Нет данных о направлении ветра.")
+        return
+    mean_direction, resultant_length = wind_statistics.circular_mean(df["avg_wind_dir_deg"])
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Среднее направление ветра", f"{mean_direction:.0f}°")
     with col2:
-        st.metric("Средний уровень осадков", f"{metrics.calculate_avg_precip(df):.2f} мм")
-        st.metric("Дни с дождём", metrics.calculate_rain_days(df))
-        st.metric("Дни со снегом", metrics.calculate_snow_days(df))
-        st.metric("Корреляция температуры и осадков",
-                  f"{metrics.calculate_temp_precip_corr(df):.2f}")
+        st.metric("Устойчивость направления", f"{resultant_length:.2f}",
+                  help="Длина среднего вектора: 1 — ветер всегда с одной стороны, "
+                       "0 — направления равномерно распределены.")
+    fig_rose = create_wind_rose(wind_statistics.calculate_wind_rose(df))
+    st.plotly_chart(fig_rose, use_container_width=True)
+
 
+@traced_fragment("additional_dashboard.display_timeseries_analytics")
+def display_timeseries_analytics(countries: list[str], cities: list[str], start_date, end_date):
+    """Отображает скользящие средние, отклонения от нормы и изменения к прошлому году."""
+    logger.info("Отображение аналитики временных рядов")
+    st.subheader("Временные ряды")
 
+    ts_cities = resolve_cities(countries, cities)
+    if not ts_cities:
+        st.info("Выберите страну или город для анализа временных рядов.")
+        return
+    if len(ts_cities) > LIMIT_TIMESERIES_CITIES:
+        st.warning(f"Для временных рядов используются первые {LIMIT_TIMESERIES_CITIES} "
+                   f"из {len(ts_cities)} городов.")
+        ts_cities = ts_cities[:LIMIT_TIMESERIES_CITIES]
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        metric = st.selectbox(
+            "Метрика",
+            NORMALS_METRICS,
+            index=NORMALS_METRICS.index("avg_temp_c"),
+            format_func=lambda x: COLUMN_NAMES[x],
+            key="timeseries_metric",
+        )
+    with col2:
+        indicator = st.selectbox(
+            "Показатель",
+            list(TIMESERIES_NAMES.keys()),
+            index=list(TIMESERIES_NAMES.keys()).index("rolling_30"),
+            format_func=lambda x: TIMESERIES_NAMES[x],
+            key="timeseries_indicator",
+        )
+    with col3:
+        frequency = st.radio(
+            "Шаг",
+            ["day", "month"],
+            format_func=lambda x: {"day": "День", "month": "Месяц"}[x],
+            horizontal=True,
+            key="timeseries_frequency",
+        )
+    st.caption("Рассчитывается в базе данных по всему диапазону дат без учёта фильтра сезонов "
+               "и ограничения на количество записей.")
+    try:
+        ts_df = get_timeseries_analytics(metric, ts_cities, start_date, end_date, frequency)
+        if ts_df.empty:
+            st.warning("Нет данных для временных рядов.")
+            return
+        fig_ts = create_timeseries_plot(ts_df, y=indicator, metric=metric)
+        st.plotly_chart(fig_ts, use_container_width=True)
+    except Exception as e:
+        logger.error(f"Ошибка при расчёте временных рядов: {e}")
+        st.error("Не удалось рассчитать временные ряды.")
+
+
+@traced_fragment("additional_dashboard.display_seasonal_statistics")
 def display_seasonal_statistics(df: pd.DataFrame):
     """Отображает статистику по сезонам."""
     logger.info("Отображение статистики по сезонам")
@@ -59,20 +197,22 @@ def display_seasonal_statistics(df: pd.DataFrame):
     )
 
 
+@traced_fragment("additional_dashboard.display_download_button")
 def display_download_button(df: pd.DataFrame):
     """Отображает кнопку для скачивания данных."""
     logger.info("Отображение кнопки скачивания")
 
-    st.download_button(
-        label="Скачать данные в .xlsx",
-        data=to_excel(df=metrics.calculate_seasonal_statistics(df, metrics=MAIN_METRICS),
-                      index=True,
-                      sheet_name="Seasonal Statistics"),
+    excel_download_button(
+        "Скачать данные в .xlsx",
+        metrics.calculate_seasonal_statistics(df, metrics=MAIN_METRICS),
         file_name="seasonal_statistics.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        key="seasonal_statistics_download",
+        index=True,
+        sheet_name="Seasonal Statistics",
     )
 
 
+@traced_fragment("additional_dashboard.display_map")
 def display_map(df: pd.DataFrame):
     """Отображает карту."""
     logger.info("Отображение карты")
@@ -92,15 +232,34 @@ def display_map(df: pd.DataFrame):
         format_func=lambda x: COLUMN_NAMES[x],
         key="map_metric",
     )
+    region = st.selectbox("Область карты", list(MAP_REGIONS), key="map_region")
     try:
-        map_df = get_weather_for_map(selected_date, metric_map)
+        lat_min, lat_max, lon_min, lon_max = MAP_REGIONS[region]
+        whole_world = (lat_min, lat_max, lon_min, lon_max) == (-90, 90, -180, 180)
+        # Запрашиваем погоду только для городов, попадающих в область
+        city_index = get_city_index()
+        visible_cities = city_index.frame(city_index.in_bbox(lat_min, lat_max, lon_min, lon_max))
+        map_df = get_weather_for_map(
+            selected_date, metric_map,
+            cities=None if whole_world else tuple(sorted(visible_cities["city_name"])),
+        )
         logger.info(f"Map data shape: {map_df.shape}")
         agg_df = map_df.groupby("city_name")[metric_map].mean().reset_index()
-        cities_df = get_cities()
-        map_data = pd.merge(agg_df, cities_df[["city_name", "latitude", "longitude"]],
-                            on="city_name")
-        map_data.rename(columns={"latitude": "lat", "longitude": "lng"}, inplace=True)
-        fig_map = create_map(map_data, value_col=metric_map)
+        map_data = pd.merge(agg_df, visible_cities, on="city_name")
+
+        if lon_min > lon_max:  # Область через 180-й меридиан
+            lon_max += 360
+        if len(map_data) > MAP_MAX_POINTS:
+            cell_deg = max(lat_max - lat_min, lon_max - lon_min) / np.sqrt(MAP_MAX_POINTS)
+            cities_count = len(map_data)
+            map_data = cluster_points(map_data, metric_map, cell_deg)
+            st.caption(f"{cities_count} городов объединены в {len(map_data)} кластеров "
+                       f"(размер точки — число городов).")
+        fig_map = create_map(
+            map_data, value_col=metric_map,
+            lat_range=None if whole_world else (lat_min, lat_max),
+            lon_range=None if whole_world else (lon_min, lon_max),
+        )
         st.plotly_chart(fig_map, use_container_width=True)
     except Exception as e:
         logger.error(f"Ошибка при создании карты: {e}")
@@ -0,0 +1,143 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+import logging
+from services.comparison import COMPARISON_COLUMNS, get_comparison_metrics
+from utils.column_names import COMPARISON_GROUP_NAMES, COMPARISON_NAMES
+from utils.constants import LIMIT_COMPARISON_CHART
+from utils.figure_cache import cached_figure
+from utils.tracing import traced
+from views.components import excel_download_button, traced_fragment
+
+logger = logging.getLogger(__name__)
+
+# Числовые метрики, по которым можно ранжировать
+RANKING_METRICS = [col for col in COMPARISON_COLUMNS if col != "wind_direction_mode"]
+COUNT_METRICS = ("observations", "rain_days", "snow_days")
+
+
+@traced("comparison_dashboard.create_leaderboard_plot", cached=True)
+@cached_figure()
+def create_leaderboard_plot(
+    leaderboard: pd.DataFrame, x: str = "avg_temp", y: str = "city_name"
+) -> px.bar:
+    """Создаёт горизонтальную диаграмму лидеров по метрике."""
+    fig = px.bar(
+        leaderboard,
+        x=x,
+        y=y,
+        orientation="h",
+        labels={
+            x: COMPARISON_NAMES.get(x, x),
+            y: COMPARISON_GROUP_NAMES.get(y, y),
+        },
+        title=f"{COMPARISON_NAMES.get(x, x)}: первые {len(leaderboard)}",
+    )
+    # Первое место сверху
+    fig.update_yaxes(categoryorder="array", categoryarray=leaderboard[y].tolist()[::-1])
+    return fig
+
+
+@traced_fragment("comparison_dashboard.display_comparison")
+def display_comparison(
+    countries: list[str],
+    cities: list[str],
+    seasons: list[str],
+    start_date,
+    end_date,
+):
+    """Отображает таблицу лидеров: все метрики по каждому городу или стране."""
+    logger.info("Отображение сравнения")
+    st.subheader("Сравнение")
+
+    # Вкладки отрисовываются при каждом прогоне, поэтому запрос — только по запросу
+    if not st.toggle("Рассчитать сравнение", value=False, key="comparison_enabled",
+                     help="Сравнение рассчитывается по всем наблюдениям периода, поэтому "
+                          "оно выполняется только при включённом переключателе."):
+        st.info("Включите переключатель, чтобы рассчитать сравнение для выбранных фильтров.")
+        return
+    only_selected = st.radio(
+        "Охват",
+        [False, True],
+        format_func=lambda x: "Только выбранные города" if x else
+        ("Все города выбранных стран" if countries else "Все города"),
+        horizontal=True,
+        key="comparison_scope",
+    )
+    if only_selected and not cities:
+        st.warning("Выберите города или сравните все города выбранных стран.")
+        return
+    if only_selected:
+        st.caption(f"Фильтр городов сужает сравнение: выбрано городов — {len(cities)}.")
+    else:
+        st.caption("Фильтр городов не учитывается: сравниваются все города "
+                   + ("выбранных стран." if countries else "базы данных."))
+    scope_cities = cities if only_selected else None
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        group_by = st.radio(
+            "Сравнивать",
+            list(COMPARISON_GROUP_NAMES.keys()),
+            format_func=lambda x: {"city_name": "Города", "country": "Страны"}[x],
+            horizontal=True,
+            key="comparison_group",
+        )
+    with col2:
+        sort_metric = st.selectbox(
+            "Ранжировать по",
+            RANKING_METRICS,
+            index=RANKING_METRICS.index("avg_temp"),
+            format_func=lambda x: COMPARISON_NAMES[x],
+            key="comparison_sort",
+        )
+    with col3:
+        ascending = st.checkbox("По возрастанию", value=False, key="comparison_ascending")
+    st.caption("Рассчитывается по помесячным агрегатам в базе данных без ограничения "
+               "на количество записей. Таблицу можно сортировать по любому столбцу, "
+               "нажав на его заголовок.")
+
+    try:
+        comparison_df = get_comparison_metrics(group_by, countries, scope_cities, seasons,
+                                               start_date, end_date)
+    except Exception as e:
+        logger.error(f"Ошибка при расчёте сравнения: {e}")
+        st.error("Не удалось рассчитать сравнение.")
+        return
+    if comparison_df.empty:
+        st.warning("Нет данных для сравнения.")
+        return
+
+    leaderboard = comparison_df.sort_values(sort_metric, ascending=ascending,
+                                            na_position="last", kind="stable")
+    leaderboard.insert(0, "rank", range(1, len(leaderboard) + 1))
+    st.dataframe(
+        leaderboard,
+        column_config={
+            "rank": "Место",
+            group_by: COMPARISON_GROUP_NAMES[group_by],
+            **{col: st.column_config.NumberColumn(
+                COMPARISON_NAMES[col], format="%d" if col in COUNT_METRICS else "%.2f"
+            ) for col in RANKING_METRICS},
+            "wind_direction_mode": COMPARISON_NAMES["wind_direction_mode"],
+        },
+        hide_index=True,
+        key="comparison_table",
+    )
+
+    if len(leaderboard) > 1:
+        fig_leaders = create_leaderboard_plot(
+            leaderboard.head(LIMIT_COMPARISON_CHART).dropna(subset=[sort_metric]),
+            x=sort_metric,
+            y=group_by,
+        )
+        st.plotly_chart(fig_leaders, use_container_width=True)
+
+    excel_download_button(
+        "Скачать сравнение в .xlsx",
+        leaderboard.rename(columns={"rank": "Место", **COMPARISON_GROUP_NAMES,
+                                    **COMPARISON_NAMES}),
+        file_name="comparison.xlsx",
+        key="comparison_download",
+        sheet_name="Comparison",
+    )
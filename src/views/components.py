@@ -0,0 +1,97 @@
+import functools
+import streamlit as st
+import pandas as pd
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from repository import dataframe_to_excel
+from utils import telemetry, tracing
+from utils.tracing import get_run_records, traced
+import logging
+
+logger = logging.getLogger(__name__)
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def is_fragment_rerun() -> bool:
+    """Проверяет, перезапускаются ли сейчас только фрагменты, а не весь скрипт."""
+    ctx = get_script_run_ctx()
+    return bool(ctx is not None and ctx.fragment_ids_this_run)
+
+
+def traced_fragment(stage: str):
+    """Декоратор секции дашборда: фрагмент Streamlit с трассировкой этапа `stage`.
+
+    При перезапуске одного фрагмента `app.main` не выполняется, поэтому здесь начинается
+    новый прогон трассировки и сохраняются метрики. Боковую панель фрагмент перерисовать
+    не может, поэтому в режиме отладки трассировка перезапуска выводится под секцией.
+    """
+    def decorator(func):
+        traced_func = traced(stage)(func)
+
+        @st.fragment
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not is_fragment_rerun():
+                return traced_func(*args, **kwargs)
+            tracing.start_run()
+            result = traced_func(*args, **kwargs)
+            if st.session_state.get("debug_trace_checkbox"):
+                with st.expander("Профилирование перезапуска секции"):
+                    display_run_trace(key=f"trace_table_{stage}")
+            telemetry.dump_if_configured()
+            return result
+        return wrapper
+    return decorator
+
+
+def display_run_trace(key: str = "trace_table"):
+    """Отображает этапы текущего прогона: время, строки, байты и кэш."""
+    records = get_run_records()
+    if not records:
+        st.write("Нет записей трассировки.")
+        return
+    trace_df = pd.DataFrame(records)
+    trace_df["stage"] = ["  " * depth + stage
+                         for depth, stage in zip(trace_df["depth"], trace_df["stage"])]
+    top_level = trace_df[trace_df["depth"] == 0]
+    st.metric("Время прогона", f"{top_level['duration_ms'].sum():.1f} мс")
+    st.dataframe(
+        trace_df[["stage", "duration_ms", "rows_in", "rows_out", "bytes", "cache", "status"]],
+        column_config={
+            "stage": "Этап",
+            "duration_ms": "Время (мс)",
+            "rows_in": "Строк на входе",
+            "rows_out": "Строк на выходе",
+            "bytes": "Байт",
+            "cache": "Кэш",
+            "status": "Статус",
+        },
+        hide_index=True,
+        key=key,
+    )
+
+
+def excel_download_button(
+    label: str,
+    df: pd.DataFrame,
+    file_name: str,
+    key: str,
+    index: bool = False,
+    sheet_name: str = "WeatherData",
+):
+    """Отображает кнопку скачивания .xlsx, который строится только по нажатию.
+
+    `st.download_button` принимает готовые байты, поэтому без первой кнопки файл
+    строился бы на каждом перезапуске секции.
+    """
+    if not st.button(label, key=f"{key}_prepare"):
+        return
+    logger.info(f"Подготовка файла {file_name}")
+    st.download_button(
+        label=f"Сохранить {file_name}",
+        data=dataframe_to_excel(df, index, sheet_name),
+        file_name=file_name,
+        mime=XLSX_MIME,
+        on_click="ignore",
+        key=key,
+    )
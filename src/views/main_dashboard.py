@@ -1,14 +1,18 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from repository import to_excel
 from services import metrics_calculator as metrics
 from utils.column_names import COLUMN_NAMES, MAIN_METRICS
+from utils.figure_cache import cached_figure
+from utils.tracing import traced
+from views.components import excel_download_button, traced_fragment
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+@traced("main_dashboard.create_line_plot", cached=True)
+@cached_figure()
 def create_line_plot(
     df: pd.DataFrame, x: str = "date", y: str = "avg_temp_c", color: str = "city_name"
 ) -> px.line:
@@ -27,6 +31,8 @@ def create_line_plot(
     )
 
 
+@traced("main_dashboard.create_scatter_plot", cached=True)
+@cached_figure()
 def create_scatter_plot(
     df: pd.DataFrame,
     x: str = "date",
@@ -48,6 +54,8 @@ def create_scatter_plot(
     )
 
 
+@traced("main_dashboard.create_histogram", cached=True)
+@cached_figure()
 def create_histogram(
     df: pd.DataFrame, x: str = "avg_temp_c", nbins: int = 20
 ) -> px.histogram:
@@ -62,22 +70,25 @@ def create_histogram(
     )
 
 
+@traced_fragment("main_dashboard.display_metrics")
 def display_metrics(df: pd.DataFrame):
     """Отображает ключевые метрики."""
     logger.info("Отображение ключевых метрик")
     st.subheader("Ключевые метрики")
 
+    kpis = metrics.calculate_main_metrics(df)
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Средняя температура", f"{metrics.calculate_avg_temp(df):+.2f} °C")
+        st.metric("Средняя температура", f"{kpis['avg_temp']:+.2f} °C")
     with col2:
-        st.metric("Медиана температуры", f"{metrics.calculate_median_temp(df):+.2f} °C")
+        st.metric("Медиана температуры", f"{kpis['median_temp']:+.2f} °C")
     with col3:
-        st.metric("Доля дней с осадками", f"{metrics.calculate_precip_days(df):.2f}%")
+        st.metric("Доля дней с осадками", f"{kpis['precip_days']:.2f}%")
     with col4:
-        st.metric("Средняя скорость ветра", f"{metrics.calculate_avg_wind_speed(df):.2f} км/ч")
+        st.metric("Средняя скорость ветра", f"{kpis['avg_wind_speed']:.2f} км/ч")
 
 
+@traced_fragment("main_dashboard.display_line_plot")
 def display_line_plot(df: pd.DataFrame, default_x="date", default_y="avg_temp_c"):
     """Отображает линейный график."""
     st.subheader("Линейный график")
@@ -101,6 +112,7 @@ def display_line_plot(df: pd.DataFrame, default_x="date", default_y="avg_temp_c"
     st.plotly_chart(fig_line, use_container_width=True)
 
 
+@traced_fragment("main_dashboard.display_scatter_plot")
 def display_scatter_plot(df: pd.DataFrame,
                          default_x="avg_temp_c", default_y="avg_sea_level_pres_hpa",
                          default_color="season"):
@@ -136,6 +148,7 @@ def display_scatter_plot(df: pd.DataFrame,
     st.plotly_chart(fig_scatter, use_container_width=True)
 
 
+@traced_fragment("main_dashboard.display_histogram")
 def display_histogram(df: pd.DataFrame, default_var="avg_wind_speed_kmh", default_nbins=50):
     """Отображает гистограмму."""
     st.subheader("Гистограмма")
@@ -158,6 +171,7 @@ def display_histogram(df: pd.DataFrame, default_var="avg_wind_speed_kmh", defaul
     st.plotly_chart(fig_hist, use_container_width=True)
 
 
+@traced("main_dashboard.display_charts_and_histograms")
 def display_charts_and_histograms(df: pd.DataFrame):
     """Отображает графики и диаграммы."""
     logger.info("Отображает графики и диаграммы")
@@ -168,8 +182,9 @@ def display_charts_and_histograms(df: pd.DataFrame):
     display_histogram(df, default_var="avg_wind_speed_kmh", default_nbins=50)
 
 
+@traced_fragment("main_dashboard.display_table")
 def display_table(df: pd.DataFrame):
-    """Отображает таблицу данных."""
+    """Отображает таблицу данных и кнопку её скачивания."""
     logger.info("Отображение таблицы данных")
     st.subheader("Данные")
 
@@ -187,15 +202,18 @@ def display_table(df: pd.DataFrame):
         column_config=COLUMN_NAMES,
         key="wether_records_table",
     )
+    # Кнопка внутри фрагмента таблицы, чтобы выгрузка следовала за выбранными столбцами
+    display_download_button(df, selected_metrics)
 
 
-def display_download_button(df: pd.DataFrame):
+@traced("main_dashboard.display_download_button")
+def display_download_button(df: pd.DataFrame, selected_metrics: list[str]):
     """Отображает кнопку для скачивания данных."""
     logger.info("Отображение кнопки скачивания")
 
-    st.download_button(
-        label="Скачать данные в .xlsx",
-        data=to_excel(df[st.session_state.selected_table_metrics]),
+    excel_download_button(
+        "Скачать данные в .xlsx",
+        df[selected_metrics],
         file_name="weather_data.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        key="weather_data_download",
     )
@@ -0,0 +1,113 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+import logging
+from repository import get_data_profile
+from utils.column_names import COLUMN_NAMES, PROFILE_NAMES
+from utils.figure_cache import cached_figure
+from utils.tracing import traced
+from views.components import traced_fragment
+
+logger = logging.getLogger(__name__)
+
+NUMERIC_STATISTICS = ("missing_percent", "count", "mean", "std", "min", "0.01", "0.25", "0.5",
+                      "0.75", "0.99", "max", "skewness", "kurtosis")
+OTHER_STATISTICS = ("dtype", "missing", "missing_percent", "unique", "min", "max")
+
+
+@traced("profile_dashboard.create_correlation_heatmap", cached=True)
+@cached_figure(columns=("x", "y", "correlation"))
+def create_correlation_heatmap(correlation: pd.DataFrame) -> px.imshow:
+    """Создаёт тепловую карту корреляций по таблице пар (x, y, correlation)."""
+    matrix = correlation.pivot(index="y", columns="x", values="correlation")
+    order = list(dict.fromkeys(correlation["x"]))
+    fig = px.imshow(
+        matrix.loc[order, order],
+        text_auto=".2f",
+        color_continuous_scale="RdBu_r",
+        zmin=-1,
+        zmax=1,
+        aspect="auto",
+        title="Корреляция между числовыми столбцами",
+    )
+    fig.update_layout(xaxis_title=None, yaxis_title=None)
+    return fig
+
+
+@traced_fragment("profile_dashboard.display_data_profile")
+def display_data_profile():
+    """Отображает профиль всего датасета, построенный скриптом data_profiling.py."""
+    logger.info("Отображение профиля данных")
+    st.subheader("Профиль данных")
+
+    try:
+        profile = get_data_profile()
+    except Exception as e:
+        logger.error(f"Ошибка при загрузке профиля данных: {e}")
+        st.error("Не удалось загрузить профиль данных.")
+        return
+    if profile is None:
+        st.info("Профиль данных ещё не построен. Выполните `make profile-data`.")
+        return
+
+    st.caption(f"Построен по {profile['source']} {profile['generated_at']} "
+               f"за {profile['duration_s']:.1f} с. Профиль описывает весь датасет "
+               f"и не зависит от фильтров; квантили приближённые.")
+    columns = profile["columns"]
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Строк", profile["rows"])
+    with col2:
+        st.metric("Строк с пропусками", profile["rows_with_missing"])
+    with col3:
+        duplicates = profile["duplicates"]["count"]
+        st.metric("Дубликатов (город, дата)", "—" if duplicates is None else duplicates)
+    with col4:
+        if "date" in columns:
+            # Дата в ISO-формате, время не показываем
+            st.metric("Период", f"{columns['date']['min'][:10]} — {columns['date']['max'][:10]}")
+
+    numeric_cols = profile["correlation"]["columns"]
+    numeric_df = pd.DataFrame(
+        [{"column": col, **columns[col], **columns[col].get("quantiles", {})}
+         for col in numeric_cols],
+        columns=["column", *NUMERIC_STATISTICS],
+    )
+    numeric_df["column"] = numeric_df["column"].map(lambda col: COLUMN_NAMES.get(col, col))
+    st.dataframe(
+        numeric_df,
+        column_config={
+            "column": "Столбец",
+            **{stat: st.column_config.NumberColumn(
+                PROFILE_NAMES[stat], format="%d" if stat == "count" else "%.2f"
+            ) for stat in NUMERIC_STATISTICS},
+        },
+        hide_index=True,
+    )
+
+    other_df = pd.DataFrame(
+        [{"column": COLUMN_NAMES.get(col, col), **stats}
+         for col, stats in columns.items() if col not in numeric_cols],
+        columns=["column", *OTHER_STATISTICS],
+    )
+    st.dataframe(
+        other_df,
+        column_config={
+            "column": "Столбец",
+            **{stat: PROFILE_NAMES[stat] for stat in OTHER_STATISTICS},
+            "missing": st.column_config.NumberColumn(PROFILE_NAMES["missing"], format="%d"),
+            "missing_percent": st.column_config.NumberColumn(PROFILE_NAMES["missing_percent"],
+                                                             format="%.2f"),
+            "unique": st.column_config.NumberColumn(PROFILE_NAMES["unique"], format="%d"),
+        },
+        hide_index=True,
+    )
+
+    if len(numeric_cols) > 1:
+        labels = [COLUMN_NAMES.get(col, col) for col in numeric_cols]
+        correlation = pd.DataFrame(
+            [(x, y, value) for y, row in zip(labels, profile["correlation"]["matrix"])
+             for x, value in zip(labels, row)],
+            columns=["x", "y", "correlation"],
+        ).astype({"correlation": float})
+        st.plotly_chart(create_correlation_heatmap(correlation), use_container_width=True)
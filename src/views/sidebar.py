@@ -1,6 +1,12 @@
 import streamlit as st
+import numpy as np
+import pandas as pd
 from repository import get_countries, get_cities
+from services.spatial_index import get_city_index
 from utils.constants import MIN_DATE, MAX_DATE, DEFAULT_START, DEFAULT_END, DAFAULT_TIMELINE_START
+from utils.constants import DEFAULT_RADIUS_KM, DEFAULT_NEAREST_CITIES
+from utils.telemetry import summarize
+from views.components import display_run_trace
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,22 +16,35 @@ def get_filters():
     """Создаёт фильтры в боковой панели."""
     st.sidebar.header("Фильтры данных")
     countries_df = get_countries()
+    # Состояние флажка известно до его отрисовки: при поиске по расстоянию страны не учитываются
+    distance_search = st.session_state.get("radius_search_checkbox", False)
     selected_countries = st.sidebar.multiselect(
         "Выберите страны",
         countries_df["country"].unique(),
         default=["Russia"],
+        disabled=distance_search,
+        help="Не учитывается при поиске городов по расстоянию" if distance_search else None,
         key="countries_multiselect"
     )
-    cities_df = get_cities(selected_countries)
-    available_cities = cities_df["city_name"].unique()
-    default_cities = ["Saint Petersburg"] if "Saint Petersburg" in available_cities \
-        else [available_cities[0]]
-    selected_cities = st.sidebar.multiselect(
-        "Выберите города",
-        available_cities,
-        default=default_cities,
-        key="cities_multiselect"
+    distance_search = st.sidebar.checkbox(
+        "Поиск городов по расстоянию",
+        value=False,
+        key="radius_search_checkbox"
     )
+    if distance_search:
+        selected_countries = []
+        selected_cities = get_cities_by_distance()
+    else:
+        cities_df = get_cities(selected_countries)
+        available_cities = cities_df["city_name"].unique()
+        default_cities = ["Saint Petersburg"] if "Saint Petersburg" in available_cities \
+            else [available_cities[0]]
+        selected_cities = st.sidebar.multiselect(
+            "Выберите города",
+            available_cities,
+            default=default_cities,
+            key="cities_multiselect"
+        )
 
     full_timeline_checkbox = st.sidebar.checkbox(
         "Показать весь диапазон дат",
@@ -83,3 +102,83 @@ def get_filters():
     )
 
     return selected_countries, selected_cities, selected_seasons, start_date, end_date
+
+
+def get_cities_by_distance() -> list[str]:
+    """Создаёт фильтр «города в радиусе N км» или «N ближайших городов» от выбранного города."""
+    city_index = get_city_index()
+    all_cities = sorted(city_index.names)
+    center_city = st.sidebar.selectbox(
+        "Центральный город",
+        all_cities,
+        index=all_cities.index("Saint Petersburg") if "Saint Petersburg" in all_cities else 0,
+        key="radius_center_city"
+    )
+    search_mode = st.sidebar.radio(
+        "Искать",
+        ["radius", "nearest"],
+        format_func=lambda x: {"radius": "В радиусе", "nearest": "Ближайшие"}[x],
+        horizontal=True,
+        key="distance_search_mode"
+    )
+    center = city_index.locate(center_city)
+    lat, lon = city_index.lat[center], city_index.lon[center]
+    if search_mode == "radius":
+        radius_km = st.sidebar.number_input(
+            "Радиус (км)",
+            min_value=1,
+            max_value=5000,
+            value=DEFAULT_RADIUS_KM,
+            step=50,
+            key="radius_km"
+        )
+        found = city_index.within_radius(lat, lon, radius_km)
+        found = found[np.argsort(city_index.distances_km(found, lat, lon))]
+    else:
+        nearest_count = st.sidebar.number_input(
+            "Количество ближайших городов",
+            min_value=1,
+            max_value=100,
+            value=DEFAULT_NEAREST_CITIES,
+            key="nearest_cities_count"
+        )
+        # Центральный город находится на нулевом расстоянии, поэтому ищем на один больше
+        found = city_index.nearest(lat, lon, k=nearest_count + 1)
+    nearby_cities = city_index.names[found].tolist()
+    caption = f"Найдено городов: {len(nearby_cities)}"
+    if len(found) > 1:
+        caption += f", самый дальний — {city_index.distances_km(found[-1:], lat, lon)[0]:.0f} км"
+    st.sidebar.caption(caption)
+    return nearby_cities
+
+
+def display_trace_panel():
+    """Отображает панель профилирования в боковой панели."""
+    if not st.sidebar.checkbox("Режим отладки", value=False, key="debug_trace_checkbox"):
+        return
+    with st.sidebar.expander("Профилирование прогона", expanded=True):
+        display_run_trace()
+    with st.sidebar.expander("Агрегированные метрики процесса"):
+        display_process_metrics()
+
+
+def display_process_metrics():
+    """Отображает накопленные по процессу задержки (p50/p99) по попаданиям и промахам кэша."""
+    summary = summarize()
+    if not summary:
+        st.write("Метрики ещё не собраны.")
+        return
+    st.dataframe(
+        pd.DataFrame(summary),
+        column_config={
+            "operation": "Операция",
+            "cache": "Кэш",
+            "count": "Вызовов",
+            "p50_ms": st.column_config.NumberColumn("p50 (мс)", format="%.1f"),
+            "p99_ms": st.column_config.NumberColumn("p99 (мс)", format="%.1f"),
+            "cache_hit_ratio": st.column_config.NumberColumn("Доля попаданий в кэш",
+                                                             format="%.2f"),
+        },
+        hide_index=True,
+        key="telemetry_table",
+    )